@@ -0,0 +1,109 @@
+import enum
+from dataclasses import dataclass
+from typing import Callable
+from pyusbpd.helpers import Tracked
+
+__all__ = [
+    "BitField",
+    "compile_parse",
+    "compile_encode",
+    "bitfields",
+]
+
+@dataclass(frozen=True)
+class BitField:
+    """Field of a little-endian bit layout
+
+    `offset` is the position of the least significant bit of the field,
+    `type` is bool, int or an enum the value is converted to."""
+    name: str
+    offset: int
+    width: int = 1
+    type: Callable = int
+
+    @property
+    def mask(self) -> int:
+        return (1 << self.width) - 1
+
+def _check_layout(fields: tuple, size: int):
+    used = 0
+    for field in fields:
+        assert field.width > 0
+        assert field.offset + field.width <= size * 8, f"{field.name} does not fit"
+        bits = field.mask << field.offset
+        assert not used & bits, f"{field.name} overlaps another field"
+        used |= bits
+
+def _compile(name: str, lines: list, namespace: dict) -> Callable:
+    exec("\n".join(lines), namespace)
+    return namespace[name]
+
+def compile_parse(fields: tuple, size: int = 4, tracked: bool = False) -> Callable:
+    """Generate a `parse(self, raw)` method reading `fields` from `size`
+    bytes into attributes of the same name
+
+    With `tracked` set, the attributes are stored directly in the instance
+    dict and the `Tracked` version is bumped once per parse."""
+    _check_layout(fields, size)
+    namespace = {}
+    lines = [
+        "def parse(self, raw):",
+        f"    assert len(raw) == {size}",
+        "    value = int.from_bytes(raw, 'little')",
+    ]
+    if tracked:
+        lines.append("    d = self.__dict__")
+    for field in fields:
+        target = f"d['{field.name}']" if tracked else f"self.{field.name}"
+        extract = f"(value >> {field.offset}) & {field.mask:#x}"
+        if field.type is bool:
+            lines.append(f"    {target} = bool(value & {field.mask << field.offset:#x})")
+        elif field.type is int:
+            lines.append(f"    {target} = {extract}")
+        elif issubclass(field.type, enum.Enum):
+            # Enum lookups go through a table, invalid values still raise
+            # ValueError from the enum constructor
+            lut = {member.value: member for member in field.type}
+            namespace[f"_lut_{field.name}"] = lut
+            namespace[f"_type_{field.name}"] = field.type
+            lines += [
+                "    try:",
+                f"        {target} = _lut_{field.name}[{extract}]",
+                "    except KeyError:",
+                f"        {target} = _type_{field.name}({extract})",
+            ]
+        else:
+            namespace[f"_type_{field.name}"] = field.type
+            lines.append(f"    {target} = _type_{field.name}({extract})")
+    if tracked:
+        lines.append("    d['_version'] = d.get('_version', 0) + 1")
+    return _compile("parse", lines, namespace)
+
+def compile_encode(fields: tuple, size: int = 4) -> Callable:
+    """Generate an `encode(self) -> bytes` method packing the attributes
+    named by `fields` into `size` bytes, values are truncated to their
+    field width"""
+    _check_layout(fields, size)
+    terms = []
+    for field in fields:
+        if field.type is bool or field.width == 1:
+            terms.append(f"({1 << field.offset:#x} if self.{field.name} else 0)")
+        else:
+            terms.append(f"((int(self.{field.name}) & {field.mask:#x}) << {field.offset})")
+    lines = [
+        "def encode(self):",
+        f"    return ({' | '.join(terms) or '0'}).to_bytes({size}, 'little')",
+    ]
+    return _compile("encode", lines, {})
+
+def bitfields(*fields: BitField, size: int = 4):
+    """Class decorator adding generated `parse()` and `encode()` methods
+    for the layout described by `fields`"""
+    def decorate(cls):
+        cls.BITFIELDS = fields
+        cls.parse = compile_parse(fields, size, issubclass(cls, Tracked))
+        cls.encode = compile_encode(fields, size)
+        cls.parse.__qualname__ = f"{cls.__qualname__}.parse"
+        cls.encode.__qualname__ = f"{cls.__qualname__}.encode"
+        return cls
+    return decorate
@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable
+from pyusbpd.message import parse
+
+__all__ = [
+    "ThreadPoolDecoder",
+]
+
+class ThreadPoolDecoder:
+    """Decodes frames from many ports on a thread pool
+
+    Frames of a given port are decoded one after the other, in submission
+    order, while different ports are decoded in parallel. A worker handles
+    at most `batch` frames of a port before giving other ports a turn.
+    `decode` defaults to `parse()`, any thread-safe callable taking a raw
+    frame works, such as `pyusbpd.tolerant.decode`."""
+
+    def __init__(self, max_workers: int | None = None, decode: Callable = parse, batch: int = 64):
+        assert batch > 0
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._decode = decode
+        self._batch = batch
+        self._lock = threading.Lock()
+        # Pending frames of the ports being decoded
+        self._pending = {}
+
+    def submit(self, port, raw: bytes) -> Future:
+        """Queue a frame of `port`, the returned future holds the decoded
+        message"""
+        future = Future()
+        with self._lock:
+            pending = self._pending.get(port)
+            if pending is not None:
+                pending.append((raw, future))
+                return future
+            self._pending[port] = deque([(raw, future)])
+        try:
+            self._executor.submit(self._drain, port)
+        except RuntimeError as e:
+            # Shut down, fail the frames queued meanwhile by other threads
+            with self._lock:
+                pending = self._pending.pop(port)
+            for _, queued in pending:
+                if queued is not future:
+                    queued.set_exception(e)
+            raise
+        return future
+
+    def _drain(self, port):
+        lock = self._lock
+        pending = self._pending[port]
+        while True:
+            for _ in range(self._batch):
+                with lock:
+                    if not pending:
+                        del self._pending[port]
+                        return
+                    raw, future = pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(self._decode(raw))
+                except Exception as e:
+                    future.set_exception(e)
+            with lock:
+                if not pending:
+                    del self._pending[port]
+                    return
+            try:
+                self._executor.submit(self._drain, port)
+                return
+            except RuntimeError:
+                # Shut down, finish the frames of the port in this thread
+                pass
+
+    def decode_streams(self, streams: dict[object, Iterable[bytes]]) -> dict[object, list]:
+        """Decode the frames of several ports, returning the messages of
+        each port in order"""
+        futures = {port: [self.submit(port, raw) for raw in frames]
+                   for port, frames in streams.items()}
+        return {port: [f.result() for f in port_futures]
+                for port, port_futures in futures.items()}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
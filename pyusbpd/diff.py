@@ -0,0 +1,169 @@
+import enum
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Iterable, Iterator
+
+__all__ = [
+    "IGNORED_FIELDS",
+    "DifferenceKind",
+    "Difference",
+    "message_fields",
+    "diff_traces",
+]
+
+IGNORED_FIELDS = frozenset({"header.message_id"})
+
+# Decoded payload attributes, compared field by field instead of as raw bytes
+_DECODED_LISTS = ("power_data_objects", "request_objects", "bist_do")
+_DECODED_OBJECTS = ("vdm_header", "rmdo")
+
+class DifferenceKind(enum.Enum):
+    """Kind of difference between a golden and a DUT trace"""
+    CHANGED = "changed"
+    MISSING = "missing"
+    EXTRA = "extra"
+
+@dataclass
+class Difference:
+    """Difference between a golden trace and a DUT trace
+
+    `golden_index` and `dut_index` are message positions in each trace
+    (None for messages only present on the other side). `fields` holds
+    (path, golden value, DUT value) tuples for CHANGED differences."""
+    kind: DifferenceKind
+    golden_index: int | None = None
+    dut_index: int | None = None
+    golden: object = None
+    dut: object = None
+    fields: tuple = ()
+
+def _object_fields(prefix: str, obj) -> Iterator[tuple]:
+    for field in fields(obj):
+        yield (f"{prefix}.{field.name}", getattr(obj, field.name))
+
+def message_fields(msg, ignore: frozenset = IGNORED_FIELDS) -> tuple:
+    """Return the semantic fields of a decoded message as a tuple of
+    (path, value) pairs, skipping the paths listed in `ignore`
+
+    The result is hashable and can be cached by callers comparing many
+    traces against the same reference."""
+    items = [("class", type(msg).__name__)]
+    items.extend(_object_fields("header", msg.header))
+    extended_header = getattr(msg, "extended_header", None)
+    if extended_header is not None:
+        items.extend(_object_fields("extended_header", extended_header))
+
+    decoded = False
+    for name in _DECODED_LISTS:
+        objects = getattr(msg, name, None)
+        if objects is None:
+            continue
+        decoded = True
+        for idx, obj in enumerate(objects):
+            items.append((f"{name}[{idx}].class", type(obj).__name__))
+            items.extend(_object_fields(f"{name}[{idx}]", obj))
+    for name in _DECODED_OBJECTS:
+        obj = getattr(msg, name, None)
+        if obj is None:
+            continue
+        decoded = True
+        items.extend(_object_fields(name, obj))
+
+    data_objects = getattr(msg, "data_objects", ())
+    if hasattr(msg, "vdm_header"):
+        # The first data object is the VDM header, the rest are VDOs
+        data_objects = data_objects[1:]
+    elif decoded:
+        data_objects = ()
+    for idx, data_object in enumerate(data_objects):
+        items.append((f"data_objects[{idx}]", bytes(data_object)))
+
+    return tuple(item for item in items if item[0] not in ignore)
+
+def _changed_fields(golden: tuple, dut: tuple) -> tuple:
+    golden_values = dict(golden)
+    dut_values = dict(dut)
+    paths = list(golden_values)
+    paths.extend(path for path in dut_values if path not in golden_values)
+    return tuple(
+        (path, golden_values.get(path), dut_values.get(path))
+        for path in paths
+        if golden_values.get(path) != dut_values.get(path)
+    )
+
+def _entries(trace: Iterable, ignore: frozenset) -> Iterator[tuple]:
+    for idx, item in enumerate(trace):
+        # Timestamped traces are (timestamp, message) pairs, the
+        # timestamp is never compared
+        msg = item[-1] if isinstance(item, tuple) else item
+        yield (idx, msg, message_fields(msg, ignore))
+
+def _fill(buf: deque, entries: Iterator, window: int):
+    while len(buf) < window:
+        entry = next(entries, None)
+        if entry is None:
+            return
+        buf.append(entry)
+
+def _resync_point(golden: deque, dut: deque) -> tuple | None:
+    """Find the closest pair of matching messages in both lookahead
+    windows, as (golden offset, DUT offset)"""
+    dut_positions = {}
+    for offset, entry in enumerate(dut):
+        dut_positions.setdefault(entry[2], offset)
+    best = None
+    for offset, entry in enumerate(golden):
+        if best is not None and offset >= best[0] + best[1]:
+            break
+        dut_offset = dut_positions.get(entry[2])
+        if dut_offset is None:
+            continue
+        if best is None or offset + dut_offset < best[0] + best[1]:
+            best = (offset, dut_offset)
+    return best
+
+def diff_traces(golden: Iterable, dut: Iterable, window: int = 32,
+                ignore: frozenset = IGNORED_FIELDS) -> Iterator[Difference]:
+    """Compare two decoded traces and yield their differences
+
+    Both traces are iterables of messages or of (timestamp, message)
+    pairs and are consumed lazily, keeping at most `window` messages of
+    each in memory. Messages are aligned by sequence: on a mismatch, the
+    closest matching pair within the lookahead window is used to
+    resynchronize, so the comparison runs in O(n * window) time."""
+    assert window > 0
+    golden_entries = _entries(golden, ignore)
+    dut_entries = _entries(dut, ignore)
+    golden_buf = deque()
+    dut_buf = deque()
+
+    while True:
+        _fill(golden_buf, golden_entries, window)
+        _fill(dut_buf, dut_entries, window)
+        if not golden_buf and not dut_buf:
+            return
+
+        if golden_buf and dut_buf and golden_buf[0][2] == dut_buf[0][2]:
+            golden_buf.popleft()
+            dut_buf.popleft()
+            continue
+
+        resync = None
+        if golden_buf and dut_buf:
+            resync = _resync_point(golden_buf, dut_buf)
+        if resync is None:
+            # No common message in sight, consume one message per side
+            resync = (min(len(golden_buf), 1), min(len(dut_buf), 1))
+
+        golden_count, dut_count = resync
+        for _ in range(min(golden_count, dut_count)):
+            g_idx, g_msg, g_fields = golden_buf.popleft()
+            d_idx, d_msg, d_fields = dut_buf.popleft()
+            yield Difference(DifferenceKind.CHANGED, g_idx, d_idx, g_msg, d_msg,
+                             _changed_fields(g_fields, d_fields))
+        for _ in range(golden_count - dut_count):
+            g_idx, g_msg, _ = golden_buf.popleft()
+            yield Difference(DifferenceKind.MISSING, golden_index=g_idx, golden=g_msg)
+        for _ in range(dut_count - golden_count):
+            d_idx, d_msg, _ = dut_buf.popleft()
+            yield Difference(DifferenceKind.EXTRA, dut_index=d_idx, dut=d_msg)
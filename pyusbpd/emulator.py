@@ -0,0 +1,260 @@
+import asyncio
+import socket
+from typing import Callable
+from pyusbpd.enum import *
+from pyusbpd.message import *
+from pyusbpd.message import Message
+
+__all__ = [
+    "MemoryEndpoint",
+    "StreamEndpoint",
+    "memory_link",
+    "socket_link",
+    "EmulatedPort",
+    "SourcePort",
+    "SinkPort",
+    "Emulator",
+]
+
+# USB PD r3.1 timers and counters (Tables 6-68 and 6-70), in seconds
+T_TYPEC_SEND_SOURCE_CAP = 0.150
+T_SRC_TRANSITION = 0.030
+N_CAPS_COUNT = 50
+
+class MemoryEndpoint:
+    """End of an in-memory link, frames are passed through asyncio queues"""
+
+    def __init__(self, incoming: asyncio.Queue, outgoing: asyncio.Queue):
+        self._incoming = incoming
+        self._outgoing = outgoing
+
+    async def send(self, data: bytes):
+        self._outgoing.put_nowait(bytes(data))
+
+    async def receive(self) -> bytes:
+        return await self._incoming.get()
+
+    def close(self):
+        pass
+
+class StreamEndpoint:
+    """End of a stream link, each frame is prefixed with its length"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    async def send(self, data: bytes):
+        self._writer.write(len(data).to_bytes(2, "little") + data)
+        await self._writer.drain()
+
+    async def receive(self) -> bytes:
+        length = int.from_bytes(await self._reader.readexactly(2), "little")
+        return await self._reader.readexactly(length)
+
+    def close(self):
+        self._writer.close()
+
+def memory_link() -> tuple[MemoryEndpoint, MemoryEndpoint]:
+    """Return both ends of an in-memory link"""
+    a_to_b = asyncio.Queue()
+    b_to_a = asyncio.Queue()
+    return MemoryEndpoint(b_to_a, a_to_b), MemoryEndpoint(a_to_b, b_to_a)
+
+async def socket_link() -> tuple[StreamEndpoint, StreamEndpoint]:
+    """Return both ends of a link over a local socket pair"""
+    sock_a, sock_b = socket.socketpair()
+    endpoint_a = StreamEndpoint(*await asyncio.open_connection(sock=sock_a))
+    endpoint_b = StreamEndpoint(*await asyncio.open_connection(sock=sock_b))
+    return endpoint_a, endpoint_b
+
+class EmulatedPort:
+    """Minimal protocol layer of an emulated port
+
+    Received messages are acknowledged with a GoodCRC and passed to
+    `handle()`. A received Soft_Reset resets the MessageID counter and is
+    accepted. `tap` is called with (time, port name, frame) for every
+    frame the port sends."""
+    POWER_ROLE = PortPowerRole.SINK
+    DATA_ROLE = PortDataRole.UFP
+
+    def __init__(self, endpoint, name: str = "", tap: Callable | None = None):
+        self.endpoint = endpoint
+        self.name = name
+        self.tap = tap
+        self.message_id = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.contracts = 0
+
+    async def send(self, msg: Message):
+        header = msg.header
+        header.port_power_role = bool(self.POWER_ROLE)
+        header.port_data_role = self.DATA_ROLE
+        header.specification_revision = SpecificationRevision.REV30
+        header.message_id = self.message_id
+        self.message_id = (self.message_id + 1) & 0x7
+        await self._send_frame(msg.encode())
+
+    async def _send_frame(self, data: bytes):
+        self.messages_sent += 1
+        if self.tap is not None:
+            self.tap(asyncio.get_running_loop().time(), self.name, data)
+        await self.endpoint.send(data)
+
+    async def _send_goodcrc(self, message_id: int):
+        msg = GoodCRCMessage()
+        msg.header.port_power_role = bool(self.POWER_ROLE)
+        msg.header.port_data_role = self.DATA_ROLE
+        msg.header.specification_revision = SpecificationRevision.REV30
+        msg.header.message_id = message_id
+        await self._send_frame(msg.encode())
+
+    async def soft_reset(self):
+        """Send a Soft_Reset, the partner answers with an Accept"""
+        self.message_id = 0
+        await self.send(Soft_ResetMessage())
+
+    async def run(self):
+        while True:
+            msg = parse(await self.endpoint.receive())
+            self.messages_received += 1
+            if isinstance(msg, GoodCRCMessage):
+                continue
+            await self._send_goodcrc(msg.header.message_id)
+            if isinstance(msg, Soft_ResetMessage):
+                self.message_id = 0
+                await self.send(AcceptMessage())
+                await self.on_soft_reset()
+            else:
+                await self.handle(msg)
+
+    async def handle(self, msg: Message):
+        pass
+
+    async def on_soft_reset(self):
+        pass
+
+def _default_capabilities() -> list:
+    return [
+        FixedSupplyPowerData(usb_communications_capable=True, voltage=100, maximum_current=300),
+        FixedSupplyPowerData(voltage=180, maximum_current=300),
+    ]
+
+class SourcePort(EmulatedPort):
+    """Emulated source
+
+    Advertises its capabilities every tTypeCSendSourceCap until a Request
+    arrives, then answers it with Accept and PS_RDY. With `renegotiate`
+    set, the capabilities are advertised again that many seconds after
+    each contract."""
+    POWER_ROLE = PortPowerRole.SOURCE
+    DATA_ROLE = PortDataRole.DFP
+
+    def __init__(self, endpoint, name: str = "", tap: Callable | None = None,
+                 capabilities: list | None = None, renegotiate: float | None = None):
+        super().__init__(endpoint, name, tap)
+        self.capabilities = capabilities if capabilities is not None else _default_capabilities()
+        self.renegotiate = renegotiate
+        self._requested = asyncio.Event()
+        self._advertiser = None
+
+    async def run(self):
+        self._start_advertising()
+        try:
+            await super().run()
+        finally:
+            self._advertiser.cancel()
+
+    def _start_advertising(self, delay: float = 0):
+        if self._advertiser is not None:
+            self._advertiser.cancel()
+        self._requested.clear()
+        self._advertiser = asyncio.create_task(self._advertise(delay))
+
+    async def _advertise(self, delay: float):
+        await asyncio.sleep(delay)
+        for _ in range(N_CAPS_COUNT):
+            msg = Source_CapabilitiesMessage()
+            msg.power_data_objects = self.capabilities
+            await self.send(msg)
+            try:
+                await asyncio.wait_for(self._requested.wait(), T_TYPEC_SEND_SOURCE_CAP)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    async def handle(self, msg: Message):
+        if not isinstance(msg, RequestMessage):
+            return
+        self._requested.set()
+        rdo = msg.request_objects[0] if msg.request_objects else None
+        if rdo is None or not 0 < rdo.object_position <= len(self.capabilities) \
+                or rdo.operating_current > self.capabilities[rdo.object_position - 1].maximum_current:
+            await self.send(RejectMessage())
+            return
+        await self.send(AcceptMessage())
+        await asyncio.sleep(T_SRC_TRANSITION)
+        await self.send(PS_RDYMessage())
+        self.contracts += 1
+        if self.renegotiate is not None:
+            self._start_advertising(self.renegotiate)
+
+    async def on_soft_reset(self):
+        self._start_advertising()
+
+class SinkPort(EmulatedPort):
+    """Emulated sink, requesting the PDO at `object_position` at its
+    maximum current"""
+
+    def __init__(self, endpoint, name: str = "", tap: Callable | None = None,
+                 object_position: int = 1):
+        super().__init__(endpoint, name, tap)
+        self.object_position = object_position
+
+    async def handle(self, msg: Message):
+        if isinstance(msg, Source_CapabilitiesMessage):
+            position = min(self.object_position, len(msg.power_data_objects))
+            pdo = msg.power_data_objects[position - 1]
+            current = getattr(pdo, "maximum_current", 0)
+            request = RequestMessage()
+            request.request_objects = [FixedVariableRequestDataObject(
+                object_position=position,
+                operating_current=current,
+                maximum_operating_current=current,
+            )]
+            await self.send(request)
+        elif isinstance(msg, PS_RDYMessage):
+            self.contracts += 1
+
+class Emulator:
+    """Runs many emulated source/sink pairs concurrently in one event loop"""
+
+    def __init__(self, tap: Callable | None = None, renegotiate: float | None = None):
+        self.tap = tap
+        self.renegotiate = renegotiate
+        self.ports = []
+
+    def add_pair(self, endpoints: tuple | None = None, capabilities: list | None = None,
+                 object_position: int = 1) -> tuple[SourcePort, SinkPort]:
+        """Add a source and a sink connected through `endpoints`, an
+        in-memory link by default"""
+        if endpoints is None:
+            endpoints = memory_link()
+        idx = len(self.ports) // 2
+        source = SourcePort(endpoints[0], f"source{idx}", self.tap,
+                            capabilities, self.renegotiate)
+        sink = SinkPort(endpoints[1], f"sink{idx}", self.tap, object_position)
+        self.ports += [source, sink]
+        return source, sink
+
+    async def run(self, duration: float):
+        """Run every port for `duration` seconds"""
+        tasks = [asyncio.create_task(port.run()) for port in self.ports]
+        done, _ = await asyncio.wait(tasks, timeout=duration, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
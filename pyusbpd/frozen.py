@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field, fields
+from pyusbpd.enum import *
+from pyusbpd.header import VDMHeader
+from pyusbpd.message import *
+from pyusbpd.message import Message
+
+__all__ = [
+    "FrozenHeader",
+    "FrozenVDMHeader",
+    "FrozenPowerData",
+    "FrozenFixedSupplyPowerData",
+    "FrozenVariableSupplyPowerData",
+    "FrozenBatterySupplyPowerData",
+    "FrozenFixedVariableRequestDataObject",
+    "FrozenMessage",
+    "FrozenSource_CapabilitiesMessage",
+    "FrozenRequestMessage",
+    "FrozenVendor_DefinedMessage",
+    "freeze",
+]
+
+class _Frozen:
+    """Conversion between frozen objects and their mutable counterpart"""
+    __slots__ = ()
+    MUTABLE = None
+
+    @classmethod
+    def freeze(cls, obj):
+        return cls(**{f.name: getattr(obj, f.name) for f in fields(cls)})
+
+    def thaw(self):
+        obj = self.MUTABLE()
+        for f in fields(self):
+            setattr(obj, f.name, getattr(self, f.name))
+        return obj
+
+@dataclass(frozen=True, slots=True)
+class FrozenHeader(_Frozen):
+    """Immutable USB Power Delivery Message Header (6.2.1.1)"""
+    MUTABLE = Message.Header
+    message_type: int = 0
+    port_data_role: PortDataRole = PortDataRole.UFP
+    port_power_role: bool = False
+    specification_revision: SpecificationRevision = SpecificationRevision.REV10
+    cable_plug: bool = False
+    message_id: int = 0
+    num_data_obj: int = 0
+    extended: bool = False
+
+@dataclass(frozen=True, slots=True)
+class FrozenVDMHeader(_Frozen):
+    """Immutable VDM Header (6.4.4.1)"""
+    MUTABLE = VDMHeader
+    vendor_id: int = 0
+    vdm_type: bool = False
+    structured_vdm_version: StructuredVDMVersion = StructuredVDMVersion.REV10
+    structured_vdm_version_minor: int = 0
+    vendor_use: int = 0
+    object_position: int = 0
+    command_type: VDMCommandType = VDMCommandType.REQ
+    command: VDMCommand = VDMCommand.DISCOVER_IDENTITY
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenPowerData(_Frozen):
+    MUTABLE = PowerData
+    type: PDOType = PDOType.FIXED_SUPPLY
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenFixedSupplyPowerData(FrozenPowerData):
+    """Immutable Fixed Supply Power Data Object (6.4.1.2.2)"""
+    MUTABLE = FixedSupplyPowerData
+    dualrole_power: bool = False
+    usb_suspend_supported: bool = False
+    unconstrained_power: bool = False
+    usb_communications_capable: bool = False
+    dualrole_data: bool = False
+    unchunked_extended_messages_supported: bool = False
+    epr_mode_capable: bool = False
+    peak_current: int = 0
+    voltage: int = 0
+    maximum_current: int = 0
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenVariableSupplyPowerData(FrozenPowerData):
+    """Immutable Variable Supply (non-Battery) Power Data Object (6.4.1.2.3)"""
+    MUTABLE = VariableSupplyPowerData
+    maximum_voltage: int = 0
+    minimum_voltage: int = 0
+    maximum_current: int = 0
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenBatterySupplyPowerData(FrozenPowerData):
+    """Immutable Battery Supply Power Data Object (6.4.1.2.4)"""
+    MUTABLE = BatterySupplyPowerData
+    maximum_voltage: int = 0
+    minimum_voltage: int = 0
+    maximum_allowable_power: int = 0
+
+@dataclass(frozen=True, slots=True)
+class FrozenFixedVariableRequestDataObject(_Frozen):
+    """Immutable Fixed and Variable Request Data Object (6.4.2)"""
+    MUTABLE = FixedVariableRequestDataObject
+    object_position: int = 1
+    giveback: bool = False
+    capability_mismatch: bool = False
+    usb_communications_capable: bool = False
+    no_usb_suspend: bool = False
+    unchunked_extended_messages_supported: bool = False
+    epr_mode_capable: bool = False
+    operating_current: int = 0
+    maximum_operating_current: int = 0
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenMessage(_Frozen):
+    """Immutable message
+
+    Messages with decoded data objects compare and hash on the decoded
+    fields only, their raw data objects are kept to rebuild the mutable
+    message with `thaw()`."""
+    header: FrozenHeader = FrozenHeader()
+    data_objects: tuple = ()
+
+    @classmethod
+    def freeze(cls, msg):
+        return cls(**cls._frozen_fields(msg))
+
+    @classmethod
+    def _frozen_fields(cls, msg) -> dict:
+        return {
+            "header": FrozenHeader.freeze(msg.header),
+            "data_objects": tuple(bytes(x) for x in getattr(msg, "data_objects", ())),
+        }
+
+    def thaw(self) -> Message:
+        return parse(self.header.thaw().encode() + b"".join(self.data_objects))
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenSource_CapabilitiesMessage(FrozenMessage):
+    data_objects: tuple = field(default=(), compare=False)
+    power_data_objects: tuple = ()
+
+    @classmethod
+    def _frozen_fields(cls, msg) -> dict:
+        values = FrozenMessage._frozen_fields(msg)
+        values["power_data_objects"] = tuple(freeze(x) for x in msg.power_data_objects)
+        return values
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenRequestMessage(FrozenMessage):
+    data_objects: tuple = field(default=(), compare=False)
+    request_objects: tuple = ()
+
+    @classmethod
+    def _frozen_fields(cls, msg) -> dict:
+        values = FrozenMessage._frozen_fields(msg)
+        values["request_objects"] = tuple(freeze(x) for x in msg.request_objects)
+        return values
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FrozenVendor_DefinedMessage(FrozenMessage):
+    data_objects: tuple = field(default=(), compare=False)
+    vdm_header: FrozenVDMHeader = FrozenVDMHeader()
+    vdos: tuple = ()
+
+    @classmethod
+    def _frozen_fields(cls, msg) -> dict:
+        values = FrozenMessage._frozen_fields(msg)
+        values["vdm_header"] = FrozenVDMHeader.freeze(msg.vdm_header)
+        values["vdos"] = values["data_objects"][1:]
+        return values
+
+_FROZEN_CLASSES = {
+    Message.Header: FrozenHeader,
+    VDMHeader: FrozenVDMHeader,
+    PowerData: FrozenPowerData,
+    FixedSupplyPowerData: FrozenFixedSupplyPowerData,
+    VariableSupplyPowerData: FrozenVariableSupplyPowerData,
+    BatterySupplyPowerData: FrozenBatterySupplyPowerData,
+    FixedVariableRequestDataObject: FrozenFixedVariableRequestDataObject,
+    Message: FrozenMessage,
+    Source_CapabilitiesMessage: FrozenSource_CapabilitiesMessage,
+    RequestMessage: FrozenRequestMessage,
+    Vendor_DefinedMessage: FrozenVendor_DefinedMessage,
+    # The payload of extended messages is not kept when parsing, there is
+    # nothing to compare them on nor to thaw them from
+    ExtendedMessage: None,
+}
+
+def freeze(obj):
+    """Return the immutable, hashable counterpart of a decoded object"""
+    for cls in type(obj).__mro__:
+        if cls in _FROZEN_CLASSES:
+            frozen_cls = _FROZEN_CLASSES[cls]
+            if frozen_cls is None:
+                break
+            return frozen_cls.freeze(obj)
+    raise TypeError(f"{type(obj).__name__} has no frozen counterpart")
@@ -1,41 +1,77 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from pyusbpd.bitfield import BitField, compile_parse, compile_encode
 from pyusbpd.enum import *
-from pyusbpd.helpers import get_bit_from_array, get_int_from_array
+from pyusbpd.helpers import Tracked
 
 __all__ = [
     "VDMHeader",
 ]
 
+# Table 6-29
+_VDM_HEADER_FIELDS = (
+    BitField("vendor_id", 16, 16),
+    BitField("vdm_type", 15, 1, bool),
+)
+_STRUCTURED_VDM_HEADER_FIELDS = _VDM_HEADER_FIELDS + (
+    BitField("structured_vdm_version", 13, 2, StructuredVDMVersion),
+    BitField("structured_vdm_version_minor", 11, 2),
+    BitField("object_position", 8, 3),
+    BitField("command_type", 6, 2, VDMCommandType),
+    BitField("command", 0, 5, VDMCommand),
+)
+_UNSTRUCTURED_VDM_HEADER_FIELDS = _VDM_HEADER_FIELDS + (
+    BitField("vendor_use", 0, 15),
+)
+# Reserved bits of a structured VDM header, kept as parsed
+_STRUCTURED_VDM_HEADER_RESERVED = 0xFFFFFFFF & ~sum(
+    field.mask << field.offset for field in _STRUCTURED_VDM_HEADER_FIELDS)
+_parse_structured = compile_parse(_STRUCTURED_VDM_HEADER_FIELDS, tracked=True)
+_encode_structured = compile_encode(_STRUCTURED_VDM_HEADER_FIELDS)
+_parse_unstructured = compile_parse(_UNSTRUCTURED_VDM_HEADER_FIELDS, tracked=True)
+_encode_unstructured = compile_encode(_UNSTRUCTURED_VDM_HEADER_FIELDS)
+
 @dataclass
-class VDMHeader:
+class VDMHeader(Tracked):
     vendor_id: int = 0
     vdm_type: bool = False
     structured_vdm_version: StructuredVDMVersion = StructuredVDMVersion.REV10
+    structured_vdm_version_minor: int = 0
     vendor_use: int = 0
     object_position: int = 0
     command_type: VDMCommandType = VDMCommandType.REQ
     command: VDMCommand = VDMCommand.DISCOVER_IDENTITY
 
+    _reserved = 0
+
     def parse(self, raw: bytes):
-        assert len(raw) == 4
-        self.vendor_id = int(raw[3] << 8 | raw[2])
-        self.vdm_type = bool(raw[1] & 0x80)
-        if self.vdm_type:
-            self.structured_vdm_version = StructuredVDMVersion((raw[1] & 0x60) >> 5)
-            self.object_position = int(raw[1] & 0x07)
-            self.command_type = VDMCommandType(raw[0] & 0xC0 >> 5)
-            self.command = VDMCommand(raw[0] & 0x1F)
+        # The fields of the other layout are reset, a reused header keeps
+        # nothing from the previous one. Set without bumping the version.
+        d = self.__dict__
+        if raw[1] & 0x80:
+            _parse_structured(self, raw)
+            d.update(_UNSTRUCTURED_DEFAULTS)
+            # encode() gives the reserved bits back
+            d["_reserved"] = int.from_bytes(raw, "little") & _STRUCTURED_VDM_HEADER_RESERVED
         else:
-            self.vendor_use = int((raw[1] & 0x7F) << 8 | raw[0])
+            _parse_unstructured(self, raw)
+            d.update(_STRUCTURED_DEFAULTS)
+            d["_reserved"] = 0
 
     def encode(self) -> bytes:
-        pass
+        if self.vdm_type:
+            encoded = _encode_structured(self)
+            if self._reserved:
+                value = int.from_bytes(encoded, "little") | self._reserved
+                encoded = value.to_bytes(4, "little")
+            return encoded
+        return _encode_unstructured(self)
 
     def __repr__(self):
         if self.vdm_type: # Structured VDM
             return f"""Standard or Vendor ID: {self.vendor_id}
 VDM Type: {self.vdm_type}
 Structured VDM version: {self.structured_vdm_version}
+Structured VDM version (minor): {self.structured_vdm_version_minor}
 Object Position: {self.object_position}
 Command Type: {self.command_type}
 Command: {self.command}"""
@@ -43,3 +79,11 @@ Command: {self.command}"""
             return f"""Vendor ID: {self.vendor_id}
 VDM Type: {self.vdm_type}
 Vendor Use: {self.vendor_use}"""
+
+def _layout_defaults(own: tuple, other: tuple) -> dict:
+    """Defaults of the VDMHeader fields only found in the `own` layout"""
+    names = {field.name for field in own} - {field.name for field in other}
+    return {f.name: f.default for f in fields(VDMHeader) if f.name in names}
+
+_STRUCTURED_DEFAULTS = _layout_defaults(_STRUCTURED_VDM_HEADER_FIELDS, _UNSTRUCTURED_VDM_HEADER_FIELDS)
+_UNSTRUCTURED_DEFAULTS = _layout_defaults(_UNSTRUCTURED_VDM_HEADER_FIELDS, _STRUCTURED_VDM_HEADER_FIELDS)
@@ -1,12 +1,30 @@
-from bitstring import BitArray
-
 def get_bit_from_array(arr: bytes, pos: int) -> bool:
     return bool(arr[pos//8] & (1 << (pos % 8)))
 
 def get_int_from_array(arr: bytes, width: int, offset: int = 0):
-    source = BitArray(arr)
-    source.byteswap()
-    source.reverse()
-    extracted = source[offset:offset+width]
-    extracted.reverse()
-    return extracted.uint
+    return (int.from_bytes(arr, "little") >> offset) & ((1 << width) - 1)
+
+class Tracked:
+    """Mixin counting attribute assignments in `_version`, so that data
+    derived from an object, like its encoding, can be cached and checked
+    for staleness"""
+    _version = 0
+
+    def __setattr__(self, name, value):
+        d = self.__dict__
+        d[name] = value
+        d["_version"] = d.get("_version", 0) + 1
+
+def snapshot(objects) -> tuple:
+    """Record the identity and version of `objects`"""
+    return tuple((obj, getattr(obj, "_version", 0)) for obj in objects)
+
+def snapshot_matches(snap: tuple | None, objects) -> bool:
+    """Check that `objects` are the same, unmodified objects as when `snap`
+    was taken"""
+    if snap is None or len(snap) != len(objects):
+        return False
+    for (obj, version), current in zip(snap, objects):
+        if obj is not current or version != getattr(current, "_version", 0):
+            return False
+    return True
@@ -1,8 +1,11 @@
 import abc
 from dataclasses import dataclass
+from types import MappingProxyType
 import bitstring
+from pyusbpd.bitfield import BitField, bitfields, compile_parse, compile_encode
 from pyusbpd.enum import *
 from pyusbpd.helpers import get_bit_from_array, get_int_from_array
+from pyusbpd.helpers import Tracked, snapshot, snapshot_matches
 from pyusbpd.header import VDMHeader
 
 __all__ = [
@@ -38,17 +41,46 @@ __all__ = [
     "Vendor_DefinedMessage",
     "PowerData",
     "FixedSupplyPowerData",
+    "VariableSupplyPowerData",
+    "BatterySupplyPowerData",
     "Source_CapabilitiesMessage",
     "RevisionMessage",
     "RequestMessage",
-    "parse"
+    "FixedVariableRequestDataObject",
+    "parse",
+    "parse_into",
 ]
 
+# USB PD r3.1 section numbers
+_HEADER_FIELDS = (
+    BitField("message_type", 0, 5), # 6.2.1.1.8
+    BitField("port_data_role", 5, 1, PortDataRole), # 6.2.1.1.6
+    BitField("specification_revision", 6, 2, SpecificationRevision), # 6.2.1.1.5
+    BitField("port_power_role", 8, 1, bool), # 6.2.1.1.4
+    BitField("message_id", 9, 3), # 6.2.1.1.3
+    BitField("num_data_obj", 12, 3), # 6.2.1.1.2
+    BitField("extended", 15, 1, bool), # 6.2.1.1.1
+)
+_parse_header = compile_parse(_HEADER_FIELDS, size=2, tracked=True)
+_encode_header = compile_encode(_HEADER_FIELDS, size=2)
+
+def _parse_item(objects: list, i: int, cls: type, raw):
+    """Parse `raw` into objects[i], reusing the object there when it is a
+    `cls`, the list grows by one when i is its length"""
+    if i < len(objects):
+        obj = objects[i]
+        if type(obj) is not cls:
+            obj = objects[i] = cls()
+    else:
+        obj = cls()
+        objects.append(obj)
+    obj.parse(raw)
+
 class Message:
     __metaclass__ = abc.ABCMeta
 
     @dataclass
-    class Header:
+    class Header(Tracked):
         """USB Power Delivery Message Header (6.2.1.1)"""
         message_type: int = 0
         port_data_role: PortDataRole = PortDataRole.UFP
@@ -60,43 +92,19 @@ class Message:
         extended: bool = False
 
         def parse(self, raw: bytes):
-            assert len(raw) == 2
-
-            # USB PD r3.1 section numbers
-            self.message_type = get_int_from_array(raw, width=5, offset=0) # 6.2.1.1.8
-            self.port_data_role = PortDataRole(get_bit_from_array(raw, 5)) # 6.2.1.1.6
-            self.specification_revision = SpecificationRevision(get_int_from_array(raw, width=2, offset=6)) # 6.2.1.1.5
-            self.cable_plug = get_bit_from_array(raw, 8) # 6.2.1.1.7
-            self.port_power_role = get_bit_from_array(raw, 8) # 6.2.1.1.4
-            self.message_id = get_int_from_array(raw, width=3, offset=9) # 6.2.1.1.3
-            self.num_data_obj = get_int_from_array(raw, width=3, offset=12) # 6.2.1.1.2
-            self.extended = get_bit_from_array(raw, 15) # 6.2.1.1.1
+            _parse_header(self, raw)
+            # Cable Plug shares its bit with Port Power Role (6.2.1.1.7)
+            self.cable_plug = self.port_power_role
 
         def encode(self) -> bytes:
-            sop_only_fmt = """
-                bool=extended,
-                uint:3=num_data_obj,
-                uint:3=message_id,
-                bool=port_power_role,
-                uint:2=specification_revision,
-                bool=port_data_role,
-                uint:5=message_type,
-            """
-            val = {
-                'message_type': self.message_type,
-                'port_data_role': bool(self.port_data_role),
-                'specification_revision': self.specification_revision,
-                'port_power_role': self.port_power_role,
-                'message_id': self.message_id,
-                'num_data_obj': self.num_data_obj,
-                'extended': self.extended,
-            }
-            s = bitstring.pack(sop_only_fmt, **val)
-            s.byteswap()
-            return s.bytes
+            return _encode_header(self)
 
     def __init__(self):
         self.header = Message.Header()
+        self._encoded = None
+        self._num_data_obj = 0
+        self._payload_snapshot = None
+        self._header_snapshot = None
 
     @abc.abstractmethod
     def parse(self, raw: bytes):
@@ -106,6 +114,33 @@ class Message:
     def encode(self) -> bytes:
         return
 
+    def _payload_objects(self) -> tuple:
+        """Objects the data objects are encoded from"""
+        return ()
+
+    def _encode_data_objects(self) -> list:
+        return []
+
+    def _encode_cached(self) -> bytes:
+        """Encode the message, reusing the previous encoding as long as the
+        objects returned by _payload_objects() are the same and were not
+        modified. When only the header changed, its 2 bytes are patched."""
+        objects = self._payload_objects()
+        if self._encoded is None or not snapshot_matches(self._payload_snapshot, objects):
+            data_objects = self._encode_data_objects()
+            self._encoded = bytearray(2) + b''.join(data_objects)
+            self._num_data_obj = len(data_objects)
+            self._payload_snapshot = snapshot(objects)
+            self._header_snapshot = None
+
+        header = self.header
+        if header.num_data_obj != self._num_data_obj:
+            header.num_data_obj = self._num_data_obj
+        if not snapshot_matches(self._header_snapshot, (header,)):
+            self._encoded[0:2] = header.encode()
+            self._header_snapshot = snapshot((header,))
+        return bytes(self._encoded)
+
 class ControlMessage(Message):
     """Control Message (6.3)"""
 
@@ -113,7 +148,7 @@ class ControlMessage(Message):
         super().parse(raw)
 
     def encode(self) -> bytes:
-        return self.header.encode()
+        return self._encode_cached()
 
 class DataMessage(Message):
     """Data Message (6.4)"""
@@ -127,13 +162,26 @@ class DataMessage(Message):
         self._parse_data_objects(raw[2:])
 
     def _parse_data_objects(self, raw):
-        self.data_objects = []
-        for i in range(self.header.num_data_obj):
-            self.data_objects.append(raw[i*4:(i+1)*4])
+        # Lists are resized in place so that parse_into() reuses them
+        data_objects = self.data_objects
+        num_data_obj = self.header.num_data_obj
+        del data_objects[num_data_obj:]
+        for i in range(num_data_obj):
+            # Copy, raw may be a view on a buffer that gets reused
+            data_object = bytes(raw[i*4:(i+1)*4])
+            if i < len(data_objects):
+                data_objects[i] = data_object
+            else:
+                data_objects.append(data_object)
 
     def encode(self) -> bytes:
-        self.header.num_data_obj = len(self.data_objects)
-        return self.header.encode() + b''.join(self.data_objects)
+        return self._encode_cached()
+
+    def _payload_objects(self) -> tuple:
+        return tuple(self.data_objects)
+
+    def _encode_data_objects(self) -> list:
+        return list(self.data_objects)
 
 class ExtendedMessage(Message):
     """Extended Message (6.5)"""
@@ -379,25 +427,46 @@ class Vendor_DefinedMessage(DataMessage):
 
     def __init__(self):
         super().__init__()
+        self.header.message_type = Vendor_DefinedMessage.MESSAGE_TYPE
         self.vdm_header = VDMHeader()
 
     def parse(self, raw: bytes):
         super().parse(raw)
         self.vdm_header.parse(self.data_objects[0])
 
+    def _payload_objects(self) -> tuple:
+        return (self.vdm_header, *self.data_objects[1:])
+
+    def _encode_data_objects(self) -> list:
+        self.data_objects = [self.vdm_header.encode()] + self.data_objects[1:]
+        return list(self.data_objects)
+
+@bitfields(
+    BitField("type", 30, 2, PDOType),
+)
 @dataclass(kw_only=True)
-class PowerData:
+class PowerData(Tracked):
     type: PDOType = PDOType.FIXED_SUPPLY
 
-    def parse(self, raw: bytes):
-        assert len(raw) == 4
-        self.type = PDOType((raw[3] & 0xC0) >> 6)
-
     def __repr__(self):
         return f"""Power data object
 ---
 Type: {self.type}"""
 
+@bitfields(
+    *PowerData.BITFIELDS,
+    BitField("dualrole_power", 29, 1, bool),
+    BitField("usb_suspend_supported", 28, 1, bool),
+    BitField("unconstrained_power", 27, 1, bool),
+    BitField("usb_communications_capable", 26, 1, bool),
+    BitField("dualrole_data", 25, 1, bool),
+    BitField("unchunked_extended_messages_supported", 24, 1, bool),
+    BitField("epr_mode_capable", 23, 1, bool),
+    BitField("peak_current", 20, 2),
+    BitField("voltage", 10, 10),
+    # Table 6-9
+    BitField("maximum_current", 0, 10),
+)
 @dataclass(kw_only=True)
 class FixedSupplyPowerData(PowerData):
     """Fixed Supply Power Data Object (6.4.1.2.2)"""
@@ -412,50 +481,6 @@ class FixedSupplyPowerData(PowerData):
     voltage: int = 0
     maximum_current: int = 0
 
-    def parse(self, raw: bytes):
-        super().parse(raw)
-        self.usb_suspend_supported = get_bit_from_array(raw, 28)
-        self.unconstrained_power = get_bit_from_array(raw, 27)
-        self.usb_communications_capable = get_bit_from_array(raw, 26)
-        self.dualrole_data = get_bit_from_array(raw, 25)
-        self.unchunked_extended_messages_supported = get_bit_from_array(raw, 24)
-        self.epr_mode_capable = get_bit_from_array(raw, 23)
-        self.peak_current = get_int_from_array(raw, offset=20, width=2)
-        self.voltage = get_int_from_array(raw, offset=10, width=10)
-        # Table 6-9
-        self.maximum_current = get_int_from_array(raw, offset=0, width=10)
-
-    def encode(self) -> bytes:
-        fmt = """
-            uint:2=0,
-            bool=dualrole_power,
-            bool=usb_suspend_supported,
-            bool=unconstrained_power,
-            bool=usb_communications_capable,
-            bool=dualrole_data,
-            bool=unchunked_extended_messages_supported,
-            bool=epr_mode_capable,
-            bool=0,
-            uint:2=peak_current,
-            uint:10=voltage,
-            uint:10=maximum_current,
-        """
-        val = {
-            'dualrole_power': self.dualrole_power,
-            'usb_suspend_supported': self.usb_suspend_supported,
-            'unconstrained_power': self.unconstrained_power,
-            'usb_communications_capable': self.usb_communications_capable,
-            'dualrole_data': self.dualrole_data,
-            'unchunked_extended_messages_supported': self.unchunked_extended_messages_supported,
-            'epr_mode_capable': self.epr_mode_capable,
-            'peak_current': self.peak_current,
-            'voltage': self.voltage,
-            'maximum_current': self.maximum_current,
-        }
-        s = bitstring.pack(fmt, **val)
-        s.byteswap()
-        return s.bytes
-
     def __repr__(self):
         return super().__repr__() + "\n" + f"""Fixed supply power data object
 ---
@@ -468,6 +493,13 @@ EPR Mode Capable: {self.epr_mode_capable}
 Voltage: {self.voltage*50/1000} V
 Maximum current: {self.maximum_current*10} mA\n"""
 
+# Table 6-11
+@bitfields(
+    *PowerData.BITFIELDS,
+    BitField("maximum_voltage", 20, 10),
+    BitField("minimum_voltage", 10, 10),
+    BitField("maximum_current", 0, 10),
+)
 @dataclass(kw_only=True)
 class VariableSupplyPowerData(PowerData):
     """Variable Supply (non-Battery) Power Data Object (6.4.1.2.3)"""
@@ -475,13 +507,13 @@ class VariableSupplyPowerData(PowerData):
     minimum_voltage: int = 0
     maximum_current: int = 0
 
-    def parse(self, raw: bytes):
-        super().parse(raw)
-        # Table 6-11
-        self.maximum_voltage = get_int_from_array(raw, offset=20, width=10)
-        self.minimum_voltage = get_int_from_array(raw, offset=10, width=10)
-        self.maximum_current = get_int_from_array(raw, offset=0, width=10)
-
+# Table 6-12
+@bitfields(
+    *PowerData.BITFIELDS,
+    BitField("maximum_voltage", 20, 10),
+    BitField("minimum_voltage", 10, 10),
+    BitField("maximum_allowable_power", 0, 10),
+)
 @dataclass(kw_only=True)
 class BatterySupplyPowerData(PowerData):
     """Battery Supply Power Data Object (6.4.1.2.4)"""
@@ -489,43 +521,43 @@ class BatterySupplyPowerData(PowerData):
     minimum_voltage: int = 0
     maximum_allowable_power: int = 0
 
-    def parse(self, raw: bytes):
-        super().parse(raw)
-        # Table 6-12
-        self.maximum_voltage = get_int_from_array(raw, offset=20, width=10)
-        self.minimum_voltage = get_int_from_array(raw, offset=10, width=10)
-        self.maximum_allowable_power = get_int_from_array(raw, offset=0, width=10)
+_POWER_DATA_CLASSES = MappingProxyType({
+    PDOType.FIXED_SUPPLY: FixedSupplyPowerData,
+    PDOType.BATTERY: BatterySupplyPowerData,
+    PDOType.VARIABLE_SUPPLY: VariableSupplyPowerData,
+})
 
 class Source_CapabilitiesMessage(DataMessage):
     MESSAGE_TYPE = 0b00001
 
     def __init__(self):
         super().__init__()
+        self.header.message_type = Source_CapabilitiesMessage.MESSAGE_TYPE
         self.power_data_objects = list()
 
     def parse(self, raw: bytes):
         super().parse(raw)
         self._parse_power_data_objects()
 
-    def encode(self) -> bytes:
-        self.data_objects = map(lambda x: x.encode(), self.power_data_objects)
-        return super().encode()
-
-    def _parse_power_data_objects(self):
-        self.power_data_objects = list()
-        for data_object in self.data_objects:
-            power_data = PowerData()
-            power_data.parse(data_object)
-            if power_data.type == PDOType.FIXED_SUPPLY:
-                power_data = FixedSupplyPowerData()
-            elif power_data.type == PDOType.BATTERY:
-                power_data = BatterySupplyPowerData()
-            elif power_data.type == PDOType.VARIABLE_SUPPLY:
-                power_data = VariableSupplyPowerData()
-            elif power_data.type == PDOType.AUGMENTED_POWER_DATA_OBJECT:
-                raise NotImplementedError
-            power_data.parse(data_object)
-            self.power_data_objects.append(power_data)
+    def _payload_objects(self) -> tuple:
+        return tuple(self.power_data_objects)
+
+    def _encode_data_objects(self) -> list:
+        self.data_objects = list(map(lambda x: x.encode(), self.power_data_objects))
+        return list(self.data_objects)
+
+    def _parse_power_data_objects(self, strict: bool = True):
+        """Decode the PDOs, unsupported ones are kept as plain PowerData
+        unless `strict` is set"""
+        power_data_objects = self.power_data_objects
+        del power_data_objects[len(self.data_objects):]
+        for i, data_object in enumerate(self.data_objects):
+            cls = _POWER_DATA_CLASSES.get(data_object[3] >> 6)
+            if cls is None:
+                if strict:
+                    raise NotImplementedError
+                cls = PowerData
+            _parse_item(power_data_objects, i, cls, data_object)
 
     def __repr__(self) -> str:
         representation = ""
@@ -536,72 +568,77 @@ class Source_CapabilitiesMessage(DataMessage):
 class RevisionMessage(DataMessage):
     MESSAGE_TYPE = 0b01100
 
+    # Table 6-52
+    @bitfields(
+        BitField("revision_major", 28, 4),
+        BitField("revision_minor", 24, 4),
+        BitField("version_major", 20, 4),
+        BitField("version_minor", 16, 4),
+    )
     @dataclass
-    class RevisionMessageDataObject:
+    class RevisionMessageDataObject(Tracked):
         """Revision Message Data Object (RMDO)"""
         revision_major: int = 0
         revision_minor: int = 0
         version_major: int = 0
         version_minor: int = 0
 
-        def parse(self, raw: bytes):
-            assert len(raw) == 4
-
-            # Table 6-52
-            self.revision_major = get_int_from_array(raw, offset=28, width=4)
-            self.revision_minor = get_int_from_array(raw, offset=24, width=4)
-            self.version_major = get_int_from_array(raw, offset=20, width=4)
-            self.version_minor = get_int_from_array(raw, offset=16, width=4)
-
-        def encode(self) -> bytes:
-            fmt = """
-                uint:4=revision_major
-                uint:4=revision_minor
-                uint:4=version_major
-                uint:4=version_minor
-                uint:32=0
-            """
-            val = {
-                'revision_major': self.revision_major,
-                'revision_minor': self.revision_minor,
-                'version_major': self.version_major,
-                'version_minor': self.version_minor,
-            }
-            s = bitstring.pack(fmt, **val)
-            s.byteswap()
-            return s.bytes
-
         def __str__(self):
-            return f"Revision {self.revision_major}.{self.revision_minor}, Version {self.version_major}.{self.verison_minor}"
+            return f"Revision {self.revision_major}.{self.revision_minor}, Version {self.version_major}.{self.version_minor}"
 
     def __init__(self):
         super().__init__()
+        self.header.message_type = RevisionMessage.MESSAGE_TYPE
         self.rmdo = RevisionMessage.RevisionMessageDataObject()
 
     def parse(self, raw: bytes):
         super().parse(raw)
         self.rmdo.parse(self.data_objects[0])
 
-    def encode(self) -> bytes:
+    def _payload_objects(self) -> tuple:
+        return (self.rmdo,)
+
+    def _encode_data_objects(self) -> list:
         self.data_objects = [self.rmdo.encode()]
-        return super.encode()
+        return list(self.data_objects)
 
 class RequestMessage(DataMessage):
     MESSAGE_TYPE = 0b00010
 
     def __init__(self):
         super().__init__()
+        self.header.message_type = RequestMessage.MESSAGE_TYPE
         self.request_objects = []
 
     def parse(self, raw: bytes):
-        pass
+        super().parse(raw)
+        self._parse_request_objects()
 
-    def encode(self) -> bytes:
-        self.data_objects = list(map(lambda x: x.encode(), self.request_objects))
-        return super().encode()
+    def _parse_request_objects(self):
+        del self.request_objects[len(self.data_objects):]
+        for i, data_object in enumerate(self.data_objects):
+            _parse_item(self.request_objects, i, FixedVariableRequestDataObject, data_object)
+
+    def _payload_objects(self) -> tuple:
+        return tuple(self.request_objects)
 
+    def _encode_data_objects(self) -> list:
+        self.data_objects = list(map(lambda x: x.encode(), self.request_objects))
+        return list(self.data_objects)
+
+@bitfields(
+    BitField("object_position", 28, 4),
+    BitField("giveback", 27, 1, bool),
+    BitField("capability_mismatch", 26, 1, bool),
+    BitField("usb_communications_capable", 25, 1, bool),
+    BitField("no_usb_suspend", 24, 1, bool),
+    BitField("unchunked_extended_messages_supported", 23, 1, bool),
+    BitField("epr_mode_capable", 22, 1, bool),
+    BitField("operating_current", 10, 10),
+    BitField("maximum_operating_current", 0, 10),
+)
 @dataclass
-class FixedVariableRequestDataObject:
+class FixedVariableRequestDataObject(Tracked):
     object_position: int = 1
     giveback: bool = False
     capability_mismatch: bool = False
@@ -612,106 +649,105 @@ class FixedVariableRequestDataObject:
     operating_current: int = 0
     maximum_operating_current: int = 0
 
-    def parse(self, raw: bytes):
-        assert len(raw) == 4
-
-        self.maximum_operating_current = get_int_from_array(raw, offset=0, width=10)
-        self.operating_current = get_int_from_array(raw, offset=10, width=10)
-        self.epr_mode_capable = get_bit_from_array(raw, 22)
-        self.unchunked_extended_messages_supported = get_bit_from_array(raw, 23)
-        self.no_usb_suspend = get_bit_from_array(raw, 24)
-        self.usb_communications_capable = get_bit_from_array(raw, 25)
-        self.capability_mismatch = get_bit_from_array(raw, 26)
-        self.giveback = get_bit_from_array(raw, 27)
-        self.object_position = get_int_from_array(raw, offset=28, width=4)
-
-    def encode(self) -> bytes:
-        return b""
-
+# Table 6-27
+@bitfields(
+    BitField("command", 28, 4),
+)
 @dataclass
-class BISTDataObject:
+class BISTDataObject(Tracked):
     command: int = 0
 
-    def parse(self, raw: bytes):
-        # Table 6-27
-        self.command = get_int_from_array(raw, offset=28, width=4)
-
 class BISTMessage(DataMessage):
     """BIST Message (6.4.3)"""
     MESSAGE_TYPE = 0b00011
 
     def __init__(self):
         super().__init__()
+        self.header.message_type = BISTMessage.MESSAGE_TYPE
         self.bist_do = []
 
     def parse(self, raw: bytes):
         super().parse(raw)
         self._parse_bist_data_objects()
 
+    def _payload_objects(self) -> tuple:
+        return tuple(self.bist_do)
+
+    def _encode_data_objects(self) -> list:
+        self.data_objects = list(map(lambda x: x.encode(), self.bist_do))
+        return list(self.data_objects)
+
     def _parse_bist_data_objects(self):
-        self.bist_do = []
-        for x in self.data_objects:
-            do = BISTDataObject()
-            do.parse(x)
-            self.bist_do.append(do)
+        del self.bist_do[len(self.data_objects):]
+        for i, data_object in enumerate(self.data_objects):
+            _parse_item(self.bist_do, i, BISTDataObject, data_object)
+
+# Dispatch tables are read-only, parse() keeps no shared mutable state and
+# can run concurrently from several threads
+_CONTROL_MESSAGE_CLASSES = MappingProxyType({cls.MESSAGE_TYPE: cls for cls in (
+    GoodCRCMessage,
+    GotoMinMessage,
+    AcceptMessage,
+    RejectMessage,
+    PingMessage,
+    PS_RDYMessage,
+    Get_Source_CapMessage,
+    Get_Sink_CapMessage,
+    DR_SwapMessage,
+    PR_SwapMessage,
+    VCONN_SwapMessage,
+    WaitMessage,
+    Soft_ResetMessage,
+    Data_ResetMessage,
+    Data_Reset_CompleteMessage,
+    Not_SupportedMessage,
+    Get_Source_Cap_ExtendedMessage,
+    Get_StatusMessage,
+    FR_SwapMessage,
+    Get_PPS_StatusMessage,
+    Get_Country_CodesMessage,
+    Get_Sink_Cap_ExtendedMessage,
+    Get_Source_InfoMessage,
+    Get_RevisionMessage,
+)})
+
+_DATA_MESSAGE_CLASSES = MappingProxyType({
+    Source_CapabilitiesMessage.MESSAGE_TYPE: Source_CapabilitiesMessage,
+    Vendor_DefinedMessage.MESSAGE_TYPE: Vendor_DefinedMessage,
+    RevisionMessage.MESSAGE_TYPE: RevisionMessage,
+    RequestMessage.MESSAGE_TYPE: RequestMessage,
+})
+
+def _frame_class(raw: bytes) -> type:
+    """Message class of a frame, picked from its raw header so that the
+    header is only decoded once, by the message itself"""
+    assert len(raw) >= 2
+    header = raw[0] | raw[1] << 8
+    if header & 0x8000:
+        return ExtendedMessage
+    if header & 0x7000:
+        return _DATA_MESSAGE_CLASSES.get(header & 0x1F, DataMessage)
+    return _CONTROL_MESSAGE_CLASSES.get(header & 0x1F, ControlMessage)
 
 def parse_controlmessage(raw: bytes) -> ControlMessage:
-    class_list = [
-        GoodCRCMessage,
-        GotoMinMessage,
-        AcceptMessage,
-        RejectMessage,
-        PingMessage,
-        PS_RDYMessage,
-        Get_Source_CapMessage,
-        Get_Sink_CapMessage,
-        DR_SwapMessage,
-        PR_SwapMessage,
-        VCONN_SwapMessage,
-        WaitMessage,
-        Soft_ResetMessage,
-        Data_ResetMessage,
-        Data_Reset_CompleteMessage,
-        Not_SupportedMessage,
-        Get_Source_Cap_ExtendedMessage,
-        Get_StatusMessage,
-        FR_SwapMessage,
-        Get_PPS_StatusMessage,
-        Get_Country_CodesMessage,
-        Get_Sink_Cap_ExtendedMessage,
-        Get_Source_InfoMessage,
-        Get_RevisionMessage,
-    ]
-    msg = ControlMessage()
+    assert len(raw) >= 2
+    msg = _CONTROL_MESSAGE_CLASSES.get(raw[0] & 0x1F, ControlMessage)()
     msg.parse(raw)
-    for cls in class_list:
-        if cls.MESSAGE_TYPE == msg.header.message_type:
-            msg = cls()
-            msg.parse(raw)
-            return msg
     return msg
 
 def parse(raw: bytes) -> Message:
-    msg = Message()
+    msg = _frame_class(raw)()
     msg.parse(raw)
+    return msg
 
-    if msg.header.extended:
-        msg = ExtendedMessage()
-    else:
-        print(msg.header.num_data_obj)
-        if msg.header.num_data_obj > 0:
-            if msg.header.message_type == Source_CapabilitiesMessage.MESSAGE_TYPE:
-                msg = Source_CapabilitiesMessage()
-            elif msg.header.message_type == Vendor_DefinedMessage.MESSAGE_TYPE:
-                msg = Vendor_DefinedMessage()
-            elif msg.header.message_type == RevisionMessage.MESSAGE_TYPE:
-                msg = RevisionMessage()
-            elif msg.header.message_type == RequestMessage.MESSAGE_TYPE:
-                msg = RequestMessage()
-            else:
-                msg = DataMessage()
-        else:
-            return parse_controlmessage(raw)
+def parse_into(msg: Message, raw: bytes) -> Message:
+    """Parse `raw` into an existing message, reusing its header, data
+    object lists and data objects instead of allocating new ones
 
+    `msg` must be of the class parse() would return for `raw`. Lists
+    previously taken from `msg` are modified."""
+    cls = _frame_class(raw)
+    if type(msg) is not cls:
+        raise TypeError(f"{cls.__name__} cannot be parsed into {type(msg).__name__}")
     msg.parse(raw)
     return msg
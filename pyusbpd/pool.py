@@ -0,0 +1,45 @@
+from pyusbpd.message import Message, _frame_class
+
+__all__ = [
+    "MessagePool",
+]
+
+class MessagePool:
+    """Recycles the messages decoded from a port
+
+    `parse()` takes a message of the right class from the pool, creating
+    one only when none is free, and parses the frame into it with
+    `parse_into()`. Messages handed back with `release()` are reused for
+    later frames along with their header, lists and data objects, so a
+    monitor releasing each message once handled decodes without growing
+    memory. At most `max_free` messages of each class are kept. A pool
+    serves a single port and is not thread-safe."""
+
+    def __init__(self, max_free: int = 4):
+        self.max_free = max_free
+        self.created = 0
+        self._free = {}
+        # id() of the free messages, to catch a message released twice
+        self._free_ids = set()
+
+    def parse(self, raw: bytes) -> Message:
+        cls = _frame_class(raw)
+        free = self._free.get(cls)
+        if free:
+            msg = free.pop()
+            self._free_ids.discard(id(msg))
+        else:
+            msg = cls()
+            self.created += 1
+        msg.parse(raw)
+        return msg
+
+    def release(self, msg: Message):
+        """Hand `msg` back, it must not be used afterwards. Raises
+        ValueError if `msg` was already released."""
+        if id(msg) in self._free_ids:
+            raise ValueError(f"{type(msg).__name__} released twice")
+        free = self._free.setdefault(type(msg), [])
+        if len(free) < self.max_free:
+            free.append(msg)
+            self._free_ids.add(id(msg))
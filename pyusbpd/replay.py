@@ -0,0 +1,142 @@
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterable
+from pyusbpd.message import Message
+
+__all__ = [
+    "MemoryTransport",
+    "PipeTransport",
+    "SocketTransport",
+    "ReplayReport",
+    "Replay",
+]
+
+class MemoryTransport:
+    """Keeps the replayed frames with the time they were sent"""
+
+    def __init__(self):
+        self.frames = []
+
+    def send(self, data: bytes):
+        self.frames.append((time.perf_counter(), data))
+
+class PipeTransport:
+    """Writes frames to a pipe or file descriptor, each frame prefixed
+    with its length on 2 bytes"""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def send(self, data: bytes):
+        os.write(self.fd, len(data).to_bytes(2, "little") + data)
+
+class SocketTransport:
+    """Sends frames over a connected socket, stream sockets get the frame
+    length prefixed on 2 bytes, datagram sockets one frame per datagram"""
+
+    def __init__(self, sock, prefix_length: bool = True):
+        self.sock = sock
+        self.prefix_length = prefix_length
+
+    def send(self, data: bytes):
+        if self.prefix_length:
+            self.sock.sendall(len(data).to_bytes(2, "little") + data)
+        else:
+            self.sock.send(data)
+
+@dataclass
+class ReplayReport:
+    """Throughput and timing error of a replay, times in seconds
+
+    The timing error of a frame is the difference between the time it was
+    handed to the transport and the time it was scheduled for."""
+    frames: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    mean_error: float = 0.0
+    max_error: float = 0.0
+    stddev_error: float = 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+class Replay:
+    """Replays a timestamped capture to a transport
+
+    The capture is an iterable of (timestamp, frame) pairs, timestamps in
+    seconds and frames either messages or raw bytes. Frames are scheduled
+    against the monotonic performance counter: the replay sleeps until
+    `spin` seconds before a frame is due and busy-waits the rest, so
+    scheduling errors do not accumulate over the capture. `speed` scales
+    the original gaps, None sends frames as fast as possible.
+
+    Re-encoding decoded messages is lossy: reserved bits are dropped and
+    extended messages cannot be encoded at all. Replay the raw frames to
+    reproduce the original bytes. A message that cannot be encoded raises
+    TypeError before it is sent."""
+
+    def __init__(self, transport, speed: float | None = 1.0, spin: float = 0.002):
+        assert speed is None or speed > 0
+        self.transport = transport
+        self.speed = speed
+        self.spin = spin
+
+    @staticmethod
+    def _frame_data(index: int, frame) -> bytes:
+        if not isinstance(frame, Message):
+            return frame
+        data = frame.encode()
+        if data is None:
+            raise TypeError(f"frame {index}: {type(frame).__name__} cannot be encoded, replay the raw frame")
+        return data
+
+    def run(self, capture: Iterable, validate: bool = False) -> ReplayReport:
+        """Replay `capture`, streaming over it. With `validate` set, the
+        capture is read and encoded in full first, so that nothing is sent
+        when one of its messages cannot be encoded."""
+        if validate:
+            capture = [(timestamp, self._frame_data(i, frame))
+                       for i, (timestamp, frame) in enumerate(capture)]
+        report = ReplayReport()
+        send = self.transport.send
+        speed = self.speed
+        spin = self.spin
+        clock = time.perf_counter
+        error_sum = 0.0
+        error_squares = 0.0
+        first = None
+        start = clock()
+
+        for i, (timestamp, frame) in enumerate(capture):
+            data = self._frame_data(i, frame)
+            if first is None:
+                first = timestamp
+                start = clock()
+            if speed is not None:
+                target = start + (timestamp - first) / speed
+                remaining = target - clock()
+                if remaining > spin:
+                    time.sleep(remaining - spin)
+                while clock() < target:
+                    pass
+                error = clock() - target
+                error_sum += error
+                error_squares += error * error
+                report.max_error = max(report.max_error, error)
+            send(data)
+            report.frames += 1
+            report.bytes += len(data)
+
+        report.elapsed = clock() - start
+        if speed is not None and report.frames:
+            report.mean_error = error_sum / report.frames
+            variance = error_squares / report.frames - report.mean_error ** 2
+            report.stddev_error = math.sqrt(max(variance, 0.0))
+        return report
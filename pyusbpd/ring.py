@@ -0,0 +1,146 @@
+import struct
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+__all__ = [
+    "Frame",
+    "FrameRingWriter",
+    "FrameRingReader",
+]
+
+# Control block: magic, slot count, slot payload size, then the write
+# index on its own cache line
+_MAGIC = b"PDRB"
+_CONTROL = struct.Struct("<4sII")
+_HEAD = struct.Struct("<Q")
+_HEAD_OFFSET = 64
+_SLOTS_OFFSET = 128
+
+# Slot header: sequence, timestamp, port, frame length
+_SLOT = struct.Struct("<QdHH4x")
+_SEQ = struct.Struct("<Q")
+
+@dataclass
+class Frame:
+    """Frame read from a ring buffer
+
+    `data` is a view on the shared memory and is only valid until the
+    writer wraps around to its slot, see `FrameRingReader.valid()`."""
+    index: int
+    timestamp: float
+    port: int
+    data: memoryview
+
+def _slot_stride(frame_size: int) -> int:
+    return (_SLOT.size + frame_size + 7) & ~7
+
+class FrameRingWriter:
+    """Single producer side of a shared memory frame ring buffer
+
+    Frames are written into fixed size slots and never wait for readers:
+    a reader falling more than `slot_count` frames behind loses frames and
+    counts an overrun. Each slot carries a sequence number which is odd
+    while the slot is written, so readers can detect torn frames without
+    taking a lock."""
+
+    def __init__(self, name: str | None = None, slot_count: int = 4096, frame_size: int = 64):
+        assert slot_count > 0
+        assert 0 < frame_size <= 0xFFFF
+        self.slot_count = slot_count
+        self.frame_size = frame_size
+        self._stride = _slot_stride(frame_size)
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_SLOTS_OFFSET + slot_count * self._stride)
+        self._buf = self._shm.buf
+        _CONTROL.pack_into(self._buf, 0, _MAGIC, slot_count, frame_size)
+        _HEAD.pack_into(self._buf, _HEAD_OFFSET, 0)
+        self._head = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def frames_written(self) -> int:
+        return self._head
+
+    def write(self, data: bytes, port: int = 0, timestamp: float = 0.0):
+        assert len(data) <= self.frame_size
+        index = self._head
+        offset = _SLOTS_OFFSET + (index % self.slot_count) * self._stride
+        buf = self._buf
+        _SEQ.pack_into(buf, offset, 2 * index + 1)
+        start = offset + _SLOT.size
+        buf[start:start + len(data)] = data
+        _SLOT.pack_into(buf, offset, 2 * index + 1, timestamp, port, len(data))
+        _SEQ.pack_into(buf, offset, 2 * index + 2)
+        self._head = index + 1
+        _HEAD.pack_into(buf, _HEAD_OFFSET, self._head)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+class FrameRingReader:
+    """Consumer side of a shared memory frame ring buffer
+
+    Every reader sees every frame, starting from the frames written after
+    it attached. Decoders sharing the load between processes can filter
+    on `Frame.port`."""
+
+    def __init__(self, name: str):
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._buf = self._shm.buf
+        magic, self.slot_count, self.frame_size = _CONTROL.unpack_from(self._buf, 0)
+        assert magic == _MAGIC
+        self._stride = _slot_stride(self.frame_size)
+        self._index = self._head()
+        self.overruns = 0
+
+    def _head(self) -> int:
+        return _HEAD.unpack_from(self._buf, _HEAD_OFFSET)[0]
+
+    def _offset(self, index: int) -> int:
+        return _SLOTS_OFFSET + (index % self.slot_count) * self._stride
+
+    def read(self) -> Frame | None:
+        """Return the next frame, or None if no complete frame is available"""
+        while True:
+            index = self._index
+            offset = self._offset(index)
+            seq, timestamp, port, length = _SLOT.unpack_from(self._buf, offset)
+            if seq < 2 * index + 2:
+                # Not written yet, or being written
+                return None
+            if seq == 2 * index + 2:
+                start = offset + _SLOT.size
+                frame = Frame(index, timestamp, port, self._buf[start:start + length])
+                if _SEQ.unpack_from(self._buf, offset)[0] == seq:
+                    self._index = index + 1
+                    return frame
+                frame.data.release()
+            # Overwritten by the writer, skip to the oldest frame still there
+            oldest = max(self._head() - self.slot_count, index + 1)
+            self.overruns += oldest - index
+            self._index = oldest
+
+    def valid(self, frame: Frame) -> bool:
+        """Check that the writer did not reuse the slot of `frame`, call
+        after decoding its data to make sure it was not torn"""
+        seq = _SEQ.unpack_from(self._buf, self._offset(frame.index))[0]
+        return seq == 2 * frame.index + 2
+
+    def __iter__(self):
+        """Iterate over the frames currently available"""
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
@@ -0,0 +1,135 @@
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from pyusbpd.message import *
+from pyusbpd.message import Message
+
+__all__ = [
+    "TrafficStatistics",
+]
+
+# Counters keyed by integers, converted back from the string keys of to_dict()
+_INT_KEYED = (
+    "offered_voltage", "offered_current",
+    "requested_voltage", "requested_current",
+    "vdm_svids",
+)
+
+@dataclass
+class TrafficStatistics:
+    """Mergeable summary of decoded traffic
+
+    Every summary is a counter, so statistics gathered separately can be
+    combined with `merge()` or `+`. Voltages are in mV and currents in mA:
+    fixed supply PDOs count their voltage, variable and battery PDOs their
+    maximum voltage. Requested voltages come from the PDO the request
+    points to in the last Source_Capabilities seen on the port.
+
+    Requests seen before any Source_Capabilities on their port are kept
+    unresolved and resolved on merge against the capabilities the other
+    statistics ended with. Merging is thus ordered: `a.merge(b)` and
+    `a + b` expect `b` to be gathered on the messages following the ones
+    of `a`. Merging the statistics of consecutive slices of a trace, in
+    order, gives the counts of a single pass over it. to_dict() keeps this
+    per-port context so partial statistics can be merged elsewhere."""
+    message_types: Counter = field(default_factory=Counter)
+    specification_revisions: Counter = field(default_factory=Counter)
+    offered_voltage: Counter = field(default_factory=Counter)
+    offered_current: Counter = field(default_factory=Counter)
+    requested_voltage: Counter = field(default_factory=Counter)
+    requested_current: Counter = field(default_factory=Counter)
+    vdm_svids: Counter = field(default_factory=Counter)
+
+    def __post_init__(self):
+        # Per port: voltage of each PDO of the last Source_Capabilities,
+        # None for non fixed supply PDOs
+        self._source_capabilities = {}
+        # Per port: object positions requested before any Source_Capabilities
+        self._unresolved = {}
+
+    def _count_requested(self, voltages: list, positions: Counter):
+        for position, count in positions.items():
+            if 0 < position <= len(voltages) and voltages[position - 1] is not None:
+                self.requested_voltage[voltages[position - 1]] += count
+
+    def update(self, msg: Message, port=0):
+        """Account for a decoded message seen on `port`"""
+        self.message_types[type(msg).__name__] += 1
+        self.specification_revisions[msg.header.specification_revision.name] += 1
+
+        if isinstance(msg, Source_CapabilitiesMessage):
+            self._source_capabilities[port] = [
+                pdo.voltage * 50 if isinstance(pdo, FixedSupplyPowerData) else None
+                for pdo in msg.power_data_objects]
+            for pdo in msg.power_data_objects:
+                if isinstance(pdo, FixedSupplyPowerData):
+                    self.offered_voltage[pdo.voltage * 50] += 1
+                    self.offered_current[pdo.maximum_current * 10] += 1
+                elif isinstance(pdo, VariableSupplyPowerData):
+                    self.offered_voltage[pdo.maximum_voltage * 50] += 1
+                    self.offered_current[pdo.maximum_current * 10] += 1
+                elif isinstance(pdo, BatterySupplyPowerData):
+                    self.offered_voltage[pdo.maximum_voltage * 50] += 1
+        elif isinstance(msg, RequestMessage):
+            positions = Counter()
+            for rdo in msg.request_objects:
+                self.requested_current[rdo.operating_current * 10] += 1
+                positions[rdo.object_position] += 1
+            voltages = self._source_capabilities.get(port)
+            if voltages is None:
+                self._unresolved.setdefault(port, Counter()).update(positions)
+            else:
+                self._count_requested(voltages, positions)
+        elif isinstance(msg, Vendor_DefinedMessage):
+            self.vdm_svids[msg.vdm_header.vendor_id] += 1
+
+    def merge(self, other: "TrafficStatistics"):
+        """Add the counts of `other` to these statistics, `other` being
+        gathered on the messages following the ones seen here"""
+        for f in fields(self):
+            getattr(self, f.name).update(getattr(other, f.name))
+        for port, positions in other._unresolved.items():
+            voltages = self._source_capabilities.get(port)
+            if voltages is None:
+                self._unresolved.setdefault(port, Counter()).update(positions)
+            else:
+                self._count_requested(voltages, positions)
+        self._source_capabilities.update(other._source_capabilities)
+
+    def __add__(self, other: "TrafficStatistics") -> "TrafficStatistics":
+        """Merged statistics, `other` following these ones"""
+        result = TrafficStatistics()
+        result.merge(self)
+        result.merge(other)
+        return result
+
+    def __iadd__(self, other: "TrafficStatistics") -> "TrafficStatistics":
+        self.merge(other)
+        return self
+
+    def to_dict(self) -> dict:
+        """Return the counters and the per-port context as a JSON
+        serializable dict, ports are kept as given to update()"""
+        values = {f.name: {str(k): v for k, v in getattr(self, f.name).items()}
+                  for f in fields(self)}
+        values["context"] = {
+            "source_capabilities": [[port, voltages]
+                                    for port, voltages in self._source_capabilities.items()],
+            "unresolved": [[port, {str(k): v for k, v in positions.items()}]
+                           for port, positions in self._unresolved.items()],
+        }
+        return values
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "TrafficStatistics":
+        stats = cls()
+        for f in fields(cls):
+            counts = values.get(f.name, {})
+            if f.name in _INT_KEYED:
+                counts = {int(k): v for k, v in counts.items()}
+            getattr(stats, f.name).update(counts)
+        context = values.get("context", {})
+        for port, voltages in context.get("source_capabilities", []):
+            stats._source_capabilities[port] = list(voltages)
+        for port, positions in context.get("unresolved", []):
+            stats._unresolved[port] = Counter({int(k): v for k, v in positions.items()})
+        return stats
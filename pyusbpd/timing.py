@@ -0,0 +1,249 @@
+import enum
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from pyusbpd.message import *
+from pyusbpd.message import Message
+
+__all__ = [
+    "TimingRule",
+    "TimingLimits",
+    "Violation",
+    "TimingAnalyzer",
+    "analyze",
+]
+
+class TimingRule(enum.Enum):
+    """PD timers checked by the timing analyzer (USB PD r3.1 6.6)"""
+    RECEIVE = "tReceive"
+    SENDER_RESPONSE = "tSenderResponse"
+    PS_TRANSITION = "tPSTransition"
+    SOURCE_CAP_INTERVAL = "tTypeCSendSourceCap"
+
+@dataclass(frozen=True)
+class TimingLimits:
+    """Timer limits in seconds (USB PD r3.1 Table 6-68)"""
+    receive: float = 1.1e-3
+    sender_response: float = 30e-3
+    ps_transition: float = 550e-3
+    source_cap_min: float = 100e-3
+    source_cap_max: float = 200e-3
+
+@dataclass
+class Violation:
+    """Timing rule violation
+
+    `start` is the time the timer was started and `timestamp` the time
+    the violation was detected. `measured` is the time between the two,
+    `missing` is set when the expected message never arrived."""
+    rule: TimingRule
+    port: object
+    timestamp: float
+    start: float
+    measured: float
+    limit: float
+    missing: bool = False
+
+# Message keys are (is data message, message type)
+_GOODCRC = (False, GoodCRCMessage.MESSAGE_TYPE)
+_ACCEPT = (False, AcceptMessage.MESSAGE_TYPE)
+_PS_RDY = (False, PS_RDYMessage.MESSAGE_TYPE)
+_SOFT_RESET = (False, Soft_ResetMessage.MESSAGE_TYPE)
+_SOURCE_CAPABILITIES = (True, Source_CapabilitiesMessage.MESSAGE_TYPE)
+_REQUEST = (True, RequestMessage.MESSAGE_TYPE)
+_SINK_CAPABILITIES = (True, 0b00100) # Table 6-6
+
+_ANSWERS = frozenset({
+    _ACCEPT,
+    (False, RejectMessage.MESSAGE_TYPE),
+    (False, WaitMessage.MESSAGE_TYPE),
+    (False, Not_SupportedMessage.MESSAGE_TYPE),
+})
+
+# Messages starting tSenderResponse, and the messages answering them
+_RESPONSES = {
+    _SOURCE_CAPABILITIES: frozenset({_REQUEST}),
+    _REQUEST: _ANSWERS,
+    (False, Get_Source_CapMessage.MESSAGE_TYPE): frozenset({
+        _SOURCE_CAPABILITIES, (False, Not_SupportedMessage.MESSAGE_TYPE)}),
+    (False, Get_Sink_CapMessage.MESSAGE_TYPE): frozenset({
+        _SINK_CAPABILITIES, (False, Not_SupportedMessage.MESSAGE_TYPE)}),
+    (False, DR_SwapMessage.MESSAGE_TYPE): _ANSWERS,
+    (False, PR_SwapMessage.MESSAGE_TYPE): _ANSWERS,
+    (False, VCONN_SwapMessage.MESSAGE_TYPE): _ANSWERS,
+    _SOFT_RESET: frozenset({_ACCEPT}),
+}
+
+def _message_key(header: Message.Header) -> tuple | None:
+    if header.extended:
+        return None
+    return (header.num_data_obj > 0, header.message_type)
+
+class _PortState:
+    """Timers of a single port, a fixed number of slots per port"""
+    __slots__ = (
+        "goodcrc_start", "goodcrc_id", "goodcrc_key",
+        "response_start", "response_acked", "response_to", "response_expected",
+        "ps_start", "ps_acked",
+        "caps_time", "caps_acked",
+    )
+
+    def __init__(self):
+        self.goodcrc_start = None
+        self.goodcrc_id = None
+        self.goodcrc_key = None
+        self.response_start = None
+        self.response_acked = False
+        self.response_to = None
+        self.response_expected = None
+        self.ps_start = None
+        self.ps_acked = False
+        self.caps_time = None
+        self.caps_acked = False
+
+class TimingAnalyzer:
+    """Streaming checker for PD timing rules
+
+    Messages are fed in capture order with their timestamp (in seconds)
+    and the port they were seen on. Each port only keeps the state of its
+    running timers, so memory use does not grow with the capture length.
+
+    Timers started by a message run from the GoodCRC acknowledging it
+    when that GoodCRC is seen, like the sender's timers do."""
+
+    def __init__(self, limits: TimingLimits = TimingLimits()):
+        self.limits = limits
+        self._ports = {}
+
+    def feed(self, timestamp: float, msg: Message, port=0) -> list[Violation]:
+        """Process a message and return the violations it revealed"""
+        state = self._ports.get(port)
+        if state is None:
+            state = self._ports[port] = _PortState()
+
+        violations = []
+        key = _message_key(msg.header)
+        if key == _GOODCRC:
+            self._on_goodcrc(state, port, timestamp, msg.header.message_id, violations)
+            self._expire(state, port, timestamp, violations)
+            return violations
+
+        answered = None
+        if key is not None and state.response_expected is not None \
+                and state.response_acked and key in state.response_expected:
+            answered = state.response_to
+            self._check(TimingRule.SENDER_RESPONSE, port, timestamp,
+                        state.response_start, self.limits.sender_response, violations)
+            state.response_start = None
+            state.response_expected = None
+        if key == _PS_RDY and state.ps_start is not None and state.ps_acked:
+            self._check(TimingRule.PS_TRANSITION, port, timestamp,
+                        state.ps_start, self.limits.ps_transition, violations)
+            state.ps_start = None
+
+        self._expire(state, port, timestamp, violations)
+        if key is None:
+            return violations
+
+        state.goodcrc_start = timestamp
+        state.goodcrc_id = msg.header.message_id
+        state.goodcrc_key = key
+
+        expected = _RESPONSES.get(key)
+        if expected is not None:
+            state.response_start = timestamp
+            state.response_acked = False
+            state.response_to = key
+            state.response_expected = expected
+        if key == _ACCEPT and answered == _REQUEST:
+            state.ps_start = timestamp
+            state.ps_acked = False
+
+        if key == _SOURCE_CAPABILITIES:
+            if state.caps_time is not None and not state.caps_acked:
+                interval = timestamp - state.caps_time
+                if interval < self.limits.source_cap_min:
+                    violations.append(Violation(TimingRule.SOURCE_CAP_INTERVAL, port, timestamp,
+                                                state.caps_time, interval, self.limits.source_cap_min))
+                elif interval > self.limits.source_cap_max:
+                    violations.append(Violation(TimingRule.SOURCE_CAP_INTERVAL, port, timestamp,
+                                                state.caps_time, interval, self.limits.source_cap_max))
+            state.caps_time = timestamp
+            state.caps_acked = False
+        elif key in (_REQUEST, _SOFT_RESET):
+            state.caps_time = None
+
+        return violations
+
+    def flush(self, timestamp: float) -> list[Violation]:
+        """Report the timers of every port that expired before `timestamp`,
+        typically the end of the capture"""
+        violations = []
+        for port, state in self._ports.items():
+            self._expire(state, port, timestamp, violations)
+        return violations
+
+    def _on_goodcrc(self, state, port, timestamp, message_id, violations):
+        if state.goodcrc_start is None or message_id != state.goodcrc_id:
+            return
+        self._check(TimingRule.RECEIVE, port, timestamp,
+                    state.goodcrc_start, self.limits.receive, violations)
+        if state.response_start is not None and not state.response_acked:
+            state.response_start = timestamp
+            state.response_acked = True
+        if state.ps_start is not None and not state.ps_acked:
+            state.ps_start = timestamp
+            state.ps_acked = True
+        if state.goodcrc_key == _SOURCE_CAPABILITIES:
+            state.caps_acked = True
+        state.goodcrc_start = None
+
+    def _expire(self, state, port, timestamp, violations):
+        limits = self.limits
+        if state.goodcrc_start is not None \
+                and timestamp - state.goodcrc_start > limits.receive:
+            self._missing(TimingRule.RECEIVE, port, timestamp,
+                          state.goodcrc_start, limits.receive, violations)
+            state.goodcrc_start = None
+            # The message was not received, timers it started never ran
+            if not state.response_acked:
+                state.response_start = None
+                state.response_expected = None
+            if not state.ps_acked:
+                state.ps_start = None
+        if state.response_start is not None and state.response_acked \
+                and timestamp - state.response_start > limits.sender_response:
+            self._missing(TimingRule.SENDER_RESPONSE, port, timestamp,
+                          state.response_start, limits.sender_response, violations)
+            state.response_start = None
+            state.response_expected = None
+        if state.ps_start is not None and state.ps_acked \
+                and timestamp - state.ps_start > limits.ps_transition:
+            self._missing(TimingRule.PS_TRANSITION, port, timestamp,
+                          state.ps_start, limits.ps_transition, violations)
+            state.ps_start = None
+
+    @staticmethod
+    def _check(rule, port, timestamp, start, limit, violations):
+        measured = timestamp - start
+        if measured > limit:
+            violations.append(Violation(rule, port, timestamp, start, measured, limit))
+
+    @staticmethod
+    def _missing(rule, port, timestamp, start, limit, violations):
+        violations.append(Violation(rule, port, timestamp, start,
+                                    timestamp - start, limit, missing=True))
+
+def analyze(stream: Iterable, limits: TimingLimits = TimingLimits()) -> Iterator[Violation]:
+    """Check a stream of (timestamp, message) or (timestamp, port, message)
+    tuples and yield violations as they are detected"""
+    analyzer = TimingAnalyzer(limits)
+    timestamp = None
+    for item in stream:
+        if len(item) == 2:
+            timestamp, msg = item
+            port = 0
+        else:
+            timestamp, port, msg = item
+        yield from analyzer.feed(timestamp, msg, port)
+    if timestamp is not None:
+        yield from analyzer.flush(timestamp)
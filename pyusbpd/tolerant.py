@@ -0,0 +1,205 @@
+import enum
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from pyusbpd.enum import *
+from pyusbpd.message import *
+from pyusbpd.message import Message, _DATA_MESSAGE_CLASSES
+
+__all__ = [
+    "DecodeErrorCategory",
+    "DecodeError",
+    "decode",
+    "TolerantDecoder",
+]
+
+class DecodeErrorCategory(enum.Enum):
+    """Reasons a frame could not be fully decoded"""
+    TRUNCATED = "truncated"
+    INVALID_FIELD = "invalid field"
+    UNSUPPORTED = "unsupported"
+    RESYNC = "resync"
+
+@dataclass
+class DecodeError:
+    """Frame that could not be fully decoded
+
+    `message` holds whatever could be decoded from `raw`, or None. RESYNC
+    errors cover bytes skipped in a stream to find the next frame."""
+    category: DecodeErrorCategory
+    raw: bytes
+    message: Message | None = None
+    detail: str = ""
+
+_STRUCTURED_VDM_VERSIONS = frozenset(v.value for v in StructuredVDMVersion)
+_VDM_COMMANDS = frozenset(c.value for c in VDMCommand)
+
+# Message types defined by USB PD r3.1 (Tables 6-5, 6-6 and 6-48), used
+# to tell frame boundaries from noise in streams
+_CONTROL_TYPES = frozenset(range(0b00001, 0b11001))
+_DATA_TYPES = frozenset(range(0b00001, 0b01101)) | {0b01111}
+_EXTENDED_TYPES = frozenset(range(0b00001, 0b10100))
+_MAX_EXTENDED_DATA_SIZE = 260
+# Skipped bytes are reported at least every so many bytes
+_MAX_RESYNC_REPORT = 4096
+
+def _header_only(cls, raw: bytes) -> Message:
+    msg = cls()
+    Message.parse(msg, raw)
+    return msg
+
+def decode(raw: bytes) -> Message | DecodeError:
+    """Decode a frame like `parse()`, without raising
+
+    The frame is checked before decoding, so malformed frames cost no
+    exception. Frames which can only be partially decoded are returned
+    as a DecodeError holding the partial message."""
+    if len(raw) < 2:
+        return DecodeError(DecodeErrorCategory.TRUNCATED, bytes(raw))
+    header = raw[0] | raw[1] << 8
+    message_type = header & 0x1F
+    num_data_obj = (header >> 12) & 0x7
+
+    if header & 0x8000:
+        if len(raw) < 4:
+            return DecodeError(DecodeErrorCategory.TRUNCATED, bytes(raw),
+                               _header_only(ExtendedMessage, raw))
+        return parse(raw)
+    if num_data_obj == 0:
+        return parse(raw)
+
+    cls = _DATA_MESSAGE_CLASSES.get(message_type, DataMessage)
+    if len(raw) < 2 + 4 * num_data_obj:
+        return DecodeError(DecodeErrorCategory.TRUNCATED, bytes(raw), _header_only(cls, raw),
+                           f"{num_data_obj} data objects in {len(raw)} bytes")
+
+    if cls is Vendor_DefinedMessage and raw[3] & 0x80:
+        detail = ""
+        if (raw[3] & 0x60) >> 5 not in _STRUCTURED_VDM_VERSIONS:
+            detail = "structured VDM version"
+        elif raw[2] & 0x1F not in _VDM_COMMANDS:
+            detail = "VDM command"
+        if detail:
+            msg = Vendor_DefinedMessage()
+            DataMessage.parse(msg, raw)
+            return DecodeError(DecodeErrorCategory.INVALID_FIELD, bytes(raw), msg, detail)
+
+    if cls is Source_CapabilitiesMessage:
+        for i in range(num_data_obj):
+            if raw[5 + 4 * i] >> 6 == PDOType.AUGMENTED_POWER_DATA_OBJECT:
+                msg = Source_CapabilitiesMessage()
+                DataMessage.parse(msg, raw)
+                msg._parse_power_data_objects(strict=False)
+                return DecodeError(DecodeErrorCategory.UNSUPPORTED, bytes(raw), msg,
+                                   "augmented power data object")
+
+    return parse(raw)
+
+def _frame_length(buf, pos: int) -> int:
+    """Length of the frame starting at `pos`, 0 if more bytes are needed
+    to tell, -1 if the bytes at `pos` do not look like a message header"""
+    header = buf[pos] | buf[pos + 1] << 8
+    message_type = header & 0x1F
+    num_data_obj = (header >> 12) & 0x7
+    if (header >> 6) & 0x3 == SpecificationRevision.RESERVED:
+        return -1
+    if header & 0x8000:
+        if message_type not in _EXTENDED_TYPES:
+            return -1
+        if len(buf) - pos < 4:
+            return 0
+        extended_header = buf[pos + 2] | buf[pos + 3] << 8
+        if extended_header & 0x8000: # Chunked
+            return 2 + 4 * num_data_obj if num_data_obj > 0 else -1
+        data_size = extended_header & 0x1FF
+        return 4 + data_size if data_size <= _MAX_EXTENDED_DATA_SIZE else -1
+    if num_data_obj == 0:
+        return 2 if message_type in _CONTROL_TYPES else -1
+    return 2 + 4 * num_data_obj if message_type in _DATA_TYPES else -1
+
+class TolerantDecoder:
+    """Exception-free decoder counting errors by category
+
+    Frames can be decoded one at a time with `decode()`, or fed as a raw
+    byte stream with `feed()`. On a stream, bytes which do not start a
+    plausible message header are skipped up to the next one and reported
+    as a single RESYNC error. With `crc` set, every frame in the stream is
+    followed by its CRC-32 (5.6.2) and frames failing the check are
+    skipped as well."""
+
+    def __init__(self, crc: bool = False):
+        self.crc = crc
+        self.errors = Counter()
+        self.frames = 0
+        self._buffer = bytearray()
+        self._skipped = bytearray()
+
+    def decode(self, raw: bytes) -> Message | DecodeError:
+        self.frames += 1
+        result = decode(raw)
+        if isinstance(result, DecodeError):
+            self.errors[result.category] += 1
+        return result
+
+    def feed(self, data: bytes) -> list:
+        """Append stream data and return the messages and errors of the
+        frames it completed"""
+        self._buffer += data
+        return self._scan(final=False)
+
+    def flush(self) -> list:
+        """Decode what is left at the end of a stream, reporting incomplete
+        frames as truncated"""
+        results = self._scan(final=True)
+        if self._skipped:
+            results.append(self._resync())
+        if self._buffer:
+            self.errors[DecodeErrorCategory.TRUNCATED] += 1
+            results.append(DecodeError(DecodeErrorCategory.TRUNCATED, bytes(self._buffer)))
+            self._buffer.clear()
+        return results
+
+    def _scan(self, final: bool) -> list:
+        buf = self._buffer
+        skipped = self._skipped
+        results = []
+        pos = 0
+        while len(buf) - pos >= 2:
+            length = _frame_length(buf, pos)
+            size = length + 4 if self.crc and length > 0 else length
+            frame = None
+            if length == 0 or len(buf) - pos < size:
+                # Without a CRC to tell, an incomplete frame at the end of
+                # the stream is reported as truncated
+                if not final or not self.crc:
+                    break
+            elif length > 0:
+                frame = bytes(buf[pos:pos + length])
+                if self.crc and zlib.crc32(frame) != int.from_bytes(buf[pos + length:pos + size], "little"):
+                    frame = None
+            if frame is None:
+                skipped.append(buf[pos])
+                pos += 1
+                if len(skipped) >= _MAX_RESYNC_REPORT:
+                    results.append(self._resync())
+                continue
+            if skipped:
+                results.append(self._resync())
+            results.append(self.decode(frame))
+            pos += size
+        del buf[:pos]
+        return results
+
+    def _resync(self) -> DecodeError:
+        skipped = bytes(self._skipped)
+        self._skipped.clear()
+        self.errors[DecodeErrorCategory.RESYNC] += 1
+        return DecodeError(DecodeErrorCategory.RESYNC, skipped,
+                           detail=f"skipped {len(skipped)} bytes")
+
+    def decode_stream(self, chunks: Iterable[bytes]) -> Iterator:
+        """Decode a byte stream given as an iterable of chunks"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.flush()
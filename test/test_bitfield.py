@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+import pytest
+from pyusbpd.bitfield import *
+from pyusbpd.enum import *
+from pyusbpd.header import VDMHeader
+from pyusbpd.message import *
+from pyusbpd.message import BISTDataObject
+
+def test_fixed_supply_dualrole_power():
+    pdo = FixedSupplyPowerData()
+    pdo.parse(b"\x2c\x91\x01\x26")
+    assert pdo.dualrole_power
+    assert pdo.usb_suspend_supported is False
+    assert pdo.voltage == 100
+    assert pdo.maximum_current == 300
+    assert pdo.encode() == b"\x2c\x91\x01\x26"
+
+@pytest.mark.parametrize("cls,raw", [
+    (FixedSupplyPowerData, b"\x96\x90\x01\x36"),
+    (VariableSupplyPowerData, b"\x2c\x91\x81\x96"),
+    (BatterySupplyPowerData, b"\x64\x90\x81\x56"),
+    (FixedVariableRequestDataObject, b"\x96\x58\x02\x13"),
+    (RevisionMessage.RevisionMessageDataObject, b"\x00\x00\x20\x31"),
+    (BISTDataObject, b"\x00\x00\x00\x50"),
+    (VDMHeader, b"\x41\xa0\x00\xFF"),
+    (VDMHeader, b"\x34\x12\x00\xFF"),
+])
+def test_data_object_roundtrip(cls, raw):
+    obj = cls()
+    obj.parse(raw)
+    assert obj.encode() == raw
+
+def test_vdm_header_command_type():
+    header = VDMHeader()
+    header.parse(b"\x41\xa0\x00\xFF")
+    assert header.command_type == VDMCommandType.ACK
+    assert header.command == VDMCommand.DISCOVER_IDENTITY
+
+def test_invalid_enum_value():
+    header = VDMHeader()
+    with pytest.raises(ValueError):
+        header.parse(b"\x07\xa0\x00\xFF")
+
+def test_overlapping_fields():
+    with pytest.raises(AssertionError):
+        compile_parse((BitField("a", 0, 4), BitField("b", 3, 2)))
+    with pytest.raises(AssertionError):
+        compile_encode((BitField("a", 30, 4),))
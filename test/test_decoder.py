@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+
+import concurrent.futures
+import pytest
+from pyusbpd.message import *
+from pyusbpd.decoder import *
+from pyusbpd.tolerant import decode, DecodeError
+
+SOURCE_CAPS = b"\x61\x11\x96\x90\x01\x36"
+GOODCRC = b"\x41\x0C"
+
+def goodcrc(message_id):
+    msg = GoodCRCMessage()
+    msg.header.message_id = message_id
+    return msg.encode()
+
+def test_decode_streams_keeps_port_order():
+    streams = {port: [goodcrc(i % 8) for i in range(200)] for port in range(16)}
+    with ThreadPoolDecoder(max_workers=4, batch=8) as decoder:
+        results = decoder.decode_streams(streams)
+    for port, messages in results.items():
+        assert [msg.header.message_id for msg in messages] == [i % 8 for i in range(200)]
+
+def test_submit_errors_and_custom_decode():
+    with ThreadPoolDecoder(max_workers=2) as decoder:
+        assert isinstance(decoder.submit("a", SOURCE_CAPS).result(), Source_CapabilitiesMessage)
+        assert decoder.submit("a", b"\x41").exception() is not None
+
+    with ThreadPoolDecoder(max_workers=2, decode=decode) as decoder:
+        assert isinstance(decoder.submit("a", b"\x41").result(), DecodeError)
+
+def test_shutdown_finishes_queued_frames():
+    with ThreadPoolDecoder(max_workers=2, batch=8) as decoder:
+        futures = [decoder.submit(0, GOODCRC) for _ in range(200)]
+    done, not_done = concurrent.futures.wait(futures, timeout=2)
+    assert not not_done
+    assert all(isinstance(f.result(), GoodCRCMessage) for f in futures)
+
+    with pytest.raises(RuntimeError):
+        decoder.submit(0, GOODCRC)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+from pyusbpd.message import *
+from pyusbpd.diff import *
+
+SOURCE_CAPS = b"\x61\x11\x96\x90\x01\x36\x3e\x61\x73\x9c"
+SOURCE_CAPS_9V = b"\x61\x21\xF0\x90\x01\x08\xC8\xA0\x04\x00"
+GOODCRC = b"\x41\x0C"
+REQUEST_1500MA = b"\x82\x12\x96\x58\x02\x10"
+REQUEST_1000MA = b"\x82\x14\x64\x90\x01\x10"
+
+def trace(*frames):
+    return [parse(frame) for frame in frames]
+
+def test_identical_traces():
+    golden = trace(SOURCE_CAPS, GOODCRC, REQUEST_1500MA)
+    dut = trace(SOURCE_CAPS, GOODCRC, REQUEST_1500MA)
+    assert list(diff_traces(golden, dut)) == []
+
+def test_message_id_and_timestamps_ignored():
+    golden = [(0.0, parse(b"\x41\x0C"))]
+    dut = [(12.5, parse(b"\x41\x02"))]
+    assert list(diff_traces(golden, dut)) == []
+
+def test_request_object_difference():
+    golden = trace(SOURCE_CAPS, REQUEST_1500MA)
+    dut = trace(SOURCE_CAPS, REQUEST_1000MA)
+    differences = list(diff_traces(golden, dut))
+    assert len(differences) == 1
+    assert differences[0].kind == DifferenceKind.CHANGED
+    assert differences[0].golden_index == 1
+    assert differences[0].fields == (
+        ("request_objects[0].operating_current", 150, 100),
+        ("request_objects[0].maximum_operating_current", 150, 100),
+    )
+
+def test_missing_and_extra_messages():
+    golden = trace(SOURCE_CAPS, GOODCRC, REQUEST_1500MA)
+    dut = trace(SOURCE_CAPS, REQUEST_1500MA, SOURCE_CAPS_9V)
+    differences = list(diff_traces(golden, dut, window=4))
+    assert [d.kind for d in differences] == [DifferenceKind.MISSING, DifferenceKind.EXTRA]
+    assert differences[0].golden_index == 1
+    assert differences[1].dut_index == 2
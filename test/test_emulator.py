@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+import asyncio
+from pyusbpd.message import *
+from pyusbpd.emulator import *
+
+def test_emulator_negotiates_contracts():
+    frames = []
+    emulator = Emulator(tap=lambda t, name, data: frames.append((name, parse(data))))
+    pairs = [emulator.add_pair(object_position=2) for _ in range(50)]
+    asyncio.run(emulator.run(0.2))
+
+    for source, sink in pairs:
+        assert source.contracts == 1
+        assert sink.contracts == 1
+
+    sent = [type(msg) for name, msg in frames if name == "source0"]
+    assert sent == [
+        Source_CapabilitiesMessage,
+        GoodCRCMessage,
+        AcceptMessage,
+        PS_RDYMessage,
+    ]
+    request = next(msg for name, msg in frames if name == "sink0" and isinstance(msg, RequestMessage))
+    assert request.request_objects[0].object_position == 2
+    assert request.request_objects[0].operating_current == 300
+
+def test_emulator_socket_link_and_soft_reset():
+    async def scenario():
+        endpoints = await socket_link()
+        emulator = Emulator()
+        source, sink = emulator.add_pair(endpoints)
+        run = asyncio.create_task(emulator.run(0.3))
+        await asyncio.sleep(0.1)
+        await sink.soft_reset()
+        await run
+        for endpoint in endpoints:
+            endpoint.close()
+        return source, sink
+
+    source, sink = asyncio.run(scenario())
+    assert source.contracts == 2
+    assert sink.contracts == 2
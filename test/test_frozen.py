@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+import dataclasses
+import pytest
+from pyusbpd.message import *
+from pyusbpd.frozen import *
+
+SOURCE_CAPS = b"\x61\x11\x96\x90\x01\x36\x3e\x61\x73\x9c"
+SOURCE_CAPS_9V = b"\x61\x21\xF0\x90\x01\x08\xC8\xA0\x04\x00"
+
+def test_frozen_source_capabilities():
+    frozen = freeze(parse(SOURCE_CAPS))
+    assert isinstance(frozen, FrozenSource_CapabilitiesMessage)
+    assert frozen == freeze(parse(SOURCE_CAPS))
+    assert frozen != freeze(parse(SOURCE_CAPS_9V))
+    assert len({frozen, freeze(parse(SOURCE_CAPS)), freeze(parse(SOURCE_CAPS_9V))}) == 2
+
+    pdo = frozen.power_data_objects[0]
+    assert isinstance(pdo, FrozenFixedSupplyPowerData)
+    assert not hasattr(pdo, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        pdo.voltage = 0
+
+def test_frozen_profiles_deduplicate():
+    profiles = {freeze(parse(SOURCE_CAPS_9V)).power_data_objects for _ in range(3)}
+    assert len(profiles) == 1
+
+def test_frozen_thaw():
+    msg = parse(SOURCE_CAPS_9V)
+    thawed = freeze(msg).thaw()
+    assert isinstance(thawed, Source_CapabilitiesMessage)
+    assert thawed.header == msg.header
+    assert thawed.power_data_objects == msg.power_data_objects
+    assert freeze(msg.header).thaw() == msg.header
+
+def test_frozen_vdm():
+    frozen = freeze(parse(b"\x8F\x10\x01\xa0\x00\xFF"))
+    assert isinstance(frozen, FrozenVendor_DefinedMessage)
+    assert frozen.vdm_header.vendor_id == 0xFF00
+    assert hash(frozen) == hash(freeze(parse(b"\x8F\x10\x01\xa0\x00\xFF")))
+
+def test_frozen_extended_message_unsupported():
+    msg = parse(b"\x81\x90\x02\x00\x00\x00")
+    assert isinstance(msg, ExtendedMessage)
+    with pytest.raises(TypeError):
+        freeze(msg)
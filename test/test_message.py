@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import pytest
 from pyusbpd.message import *
 from pyusbpd.enum import *
 
@@ -41,3 +42,74 @@ def test_reference_vdm_1():
     assert msg.vdm_header.command == VDMCommand.DISCOVER_IDENTITY
 
     assert msg.encode() == reference
+
+def test_encode_cache(monkeypatch):
+    reference = b"\x61\x21\xF0\x90\x01\x08\xC8\xA0\x04\x00"
+    msg = parse(reference)
+    assert msg.encode() == reference
+
+    # Only the header changed, the PDOs are not encoded again
+    def fail(self):
+        raise AssertionError("PDO encoded again")
+    monkeypatch.setattr(FixedSupplyPowerData, "encode", fail)
+    msg.header.message_id = 5
+    encoded = msg.encode()
+    assert encoded[2:] == reference[2:]
+    assert parse(encoded).header.message_id == 5
+    monkeypatch.undo()
+
+    msg.power_data_objects[1].voltage = 180
+    encoded = msg.encode()
+    assert parse(encoded).power_data_objects[1].voltage == 180
+    assert parse(encoded).header.message_id == 5
+
+    msg.power_data_objects.pop()
+    assert parse(msg.encode()).header.num_data_obj == 1
+
+def test_vdm_round_trip():
+    # Structured VDM Version 2.x with minor version bits set
+    reference = b"\x8F\x10\x01\xb8\x00\xFF"
+    msg = parse(reference)
+    assert msg.vdm_header.structured_vdm_version == StructuredVDMVersion.REV20
+    assert msg.vdm_header.structured_vdm_version_minor == 0b11
+    assert msg.encode() == reference
+
+    # Reserved bit 5 is kept
+    reference = b"\x8F\x10\x21\xa0\x00\xFF"
+    assert parse(reference).encode() == reference
+
+def test_vdm_encode_from_header():
+    msg = parse(b"\x8F\x10\x01\xa0\x00\xFF")
+    msg.vdm_header.command_type = VDMCommandType.ACK
+    assert msg.encode() == b"\x8F\x10\x41\xa0\x00\xFF"
+
+def test_parse_into():
+    msg = parse(b"\x61\x21\xF0\x90\x01\x08\xC8\xA0\x04\x00")
+    header = msg.header
+    pdos = msg.power_data_objects
+    first_pdo = pdos[0]
+
+    reference = b"\x61\x13\x96\x90\x01\x36"
+    assert parse_into(msg, reference) is msg
+    assert msg.header is header
+    assert msg.power_data_objects is pdos and pdos[0] is first_pdo
+    assert len(msg.data_objects) == 1
+    assert msg.power_data_objects == parse(reference).power_data_objects
+    assert msg.encode() == reference
+
+    with pytest.raises(TypeError):
+        parse_into(msg, b"\x41\x0C")
+
+def test_parse_into_vdm_layouts():
+    # Structured ACK Enter Mode, SVDM 2.0, then an unstructured VDM
+    structured = b"\x8F\x10\x44\xA1\x01\xFF"
+    unstructured = b"\x8F\x10\x67\x05\x34\x12"
+    msg = parse(structured)
+    assert msg.vdm_header.command_type == VDMCommandType.ACK
+    for raw in (unstructured, structured, unstructured):
+        parse_into(msg, raw)
+        assert msg.vdm_header == parse(raw).vdm_header
+        assert msg.encode() == raw
+    assert msg.vdm_header.vendor_use == 0x0567
+    parse_into(msg, b"\x8F\x10\x01\xa0\x00\xFF")
+    assert msg.vdm_header.vendor_use == 0
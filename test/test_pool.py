@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+import gc
+import pytest
+import tracemalloc
+from pyusbpd.message import *
+from pyusbpd.pool import *
+
+SOURCE_CAPS_9V = b"\x61\x21\xF0\x90\x01\x08\xC8\xA0\x04\x00"
+SOURCE_CAPS_5V = b"\x61\x13\x96\x90\x01\x36"
+GOODCRC = b"\x41\x0C"
+
+def test_pool_reuses_messages():
+    pool = MessagePool()
+    msg = pool.parse(SOURCE_CAPS_9V)
+    pdos = msg.power_data_objects
+    first_pdo = pdos[0]
+    pool.release(msg)
+
+    msg2 = pool.parse(SOURCE_CAPS_5V)
+    assert msg2 is msg
+    assert msg2.power_data_objects is pdos
+    assert pdos[0] is first_pdo
+    assert len(pdos) == 1
+    assert msg2.encode() == SOURCE_CAPS_5V
+    assert msg2.header.message_id == 1
+
+    goodcrc = pool.parse(GOODCRC)
+    assert isinstance(goodcrc, GoodCRCMessage)
+    assert pool.created == 2
+
+    # msg2 was not released, a new message is created
+    assert pool.parse(SOURCE_CAPS_9V) is not msg2
+    assert pool.created == 3
+
+def test_pool_double_release():
+    pool = MessagePool()
+    msg = pool.parse(GOODCRC)
+    pool.release(msg)
+    with pytest.raises(ValueError):
+        pool.release(msg)
+    assert pool.parse(GOODCRC) is msg
+    assert pool.parse(GOODCRC) is not msg
+
+def test_pool_memory_is_flat():
+    pool = MessagePool()
+    frames = [SOURCE_CAPS_9V, GOODCRC, SOURCE_CAPS_5V] * 100
+    for raw in frames:
+        pool.release(pool.parse(raw))
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(10):
+        for raw in frames:
+            pool.release(pool.parse(raw))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert growth < 4096
+    assert pool.created == 2
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+import os
+import pytest
+import socket
+from pyusbpd.message import *
+from pyusbpd.replay import *
+
+SOURCE_CAPS = b"\x61\x11\x96\x90\x01\x36"
+GOODCRC = b"\x41\x0C"
+
+def test_replay_timing():
+    capture = [(10.0 + i * 0.005, SOURCE_CAPS if i % 2 else parse(GOODCRC)) for i in range(20)]
+    transport = MemoryTransport()
+    report = Replay(transport).run(capture)
+
+    assert report.frames == 20
+    assert report.bytes == 10 * len(SOURCE_CAPS) + 10 * len(GOODCRC)
+    assert [data for _, data in transport.frames][:2] == [GOODCRC, SOURCE_CAPS]
+    assert report.elapsed >= 0.095
+    start = transport.frames[0][0]
+    for i, (sent, _) in enumerate(transport.frames):
+        assert abs(sent - start - i * 0.005) < 0.005
+    assert 0 <= report.mean_error <= report.max_error
+
+def test_replay_speed():
+    capture = [(i * 0.01, GOODCRC) for i in range(11)]
+    report = Replay(MemoryTransport(), speed=4).run(capture)
+    assert 0.025 <= report.elapsed < 0.1
+
+    report = Replay(MemoryTransport(), speed=None).run([(i * 10.0, GOODCRC) for i in range(100)])
+    assert report.frames == 100
+    assert report.elapsed < 1
+    assert report.frames_per_second > 100
+
+def test_replay_transports():
+    read_fd, write_fd = os.pipe()
+    try:
+        Replay(PipeTransport(write_fd), speed=None).run([(0, GOODCRC), (0, SOURCE_CAPS)])
+        assert os.read(read_fd, 64) == b"\x02\x00" + GOODCRC + b"\x06\x00" + SOURCE_CAPS
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    with a, b:
+        Replay(SocketTransport(a, prefix_length=False), speed=None).run([(0, GOODCRC), (0, SOURCE_CAPS)])
+        assert b.recv(64) == GOODCRC
+        assert b.recv(64) == SOURCE_CAPS
+
+def test_replay_rejects_unencodable_messages():
+    extended = parse(b"\x81\x90\x02\x00\x00\x00")
+    assert isinstance(extended, ExtendedMessage)
+    transport = MemoryTransport()
+    with pytest.raises(TypeError):
+        Replay(transport, speed=None).run([(0, GOODCRC), (1, extended)], validate=True)
+    assert transport.frames == []
+
+    # Streaming, the frames before the message are sent
+    with pytest.raises(TypeError):
+        Replay(transport, speed=None).run(iter([(0, GOODCRC), (1, extended), (2, GOODCRC)]))
+    assert [data for _, data in transport.frames] == [GOODCRC]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+from pyusbpd.message import *
+from pyusbpd.ring import *
+
+SOURCE_CAPS = b"\x61\x11\x96\x90\x01\x36\x3e\x61\x73\x9c"
+
+def test_ring_parse_frames():
+    writer = FrameRingWriter(slot_count=8)
+    reader = FrameRingReader(writer.name)
+    try:
+        assert reader.read() is None
+        writer.write(SOURCE_CAPS, port=3, timestamp=1.5)
+        writer.write(b"\x41\x0C", port=4, timestamp=1.6)
+
+        frame = reader.read()
+        assert (frame.index, frame.port, frame.timestamp) == (0, 3, 1.5)
+        msg = parse(frame.data)
+        assert reader.valid(frame)
+        assert isinstance(msg, Source_CapabilitiesMessage)
+        assert msg.power_data_objects[0].maximum_current == 150
+        frame.data.release()
+
+        frames = list(reader)
+        assert [bytes(f.data) for f in frames] == [b"\x41\x0C"]
+        for f in frames:
+            f.data.release()
+        assert reader.overruns == 0
+    finally:
+        reader.close()
+        writer.close()
+        writer.unlink()
+
+def test_ring_overrun():
+    writer = FrameRingWriter(slot_count=4, frame_size=2)
+    reader = FrameRingReader(writer.name)
+    try:
+        for i in range(10):
+            writer.write(bytes([i, 0]))
+        frames = list(reader)
+        assert [f.data[0] for f in frames] == [6, 7, 8, 9]
+        assert reader.overruns == 6
+        assert not reader.valid(Frame(0, 0.0, 0, None))
+        for f in frames:
+            f.data.release()
+    finally:
+        reader.close()
+        writer.close()
+        writer.unlink()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import json
+from pyusbpd.message import *
+from pyusbpd.stats import *
+
+SOURCE_CAPS_9V = b"\x61\x21\xF0\x90\x01\x08\xC8\xA0\x04\x00"
+REQUEST_1500MA = b"\x82\x12\x96\x58\x02\x10"
+VDM = b"\x8F\x10\x01\xa0\x00\xFF"
+GOODCRC = b"\x41\x0C"
+
+def test_statistics_update():
+    stats = TrafficStatistics()
+    for frame in (SOURCE_CAPS_9V, GOODCRC, REQUEST_1500MA, GOODCRC, VDM):
+        stats.update(parse(frame))
+
+    assert stats.message_types == {
+        "Source_CapabilitiesMessage": 1,
+        "GoodCRCMessage": 2,
+        "RequestMessage": 1,
+        "Vendor_DefinedMessage": 1,
+    }
+    assert stats.specification_revisions == {"REV20": 3, "REV30": 2}
+    assert stats.offered_voltage == {5000: 1, 14800: 1}
+    assert stats.offered_current == {2400: 1, 2000: 1}
+    assert stats.requested_voltage == {5000: 1}
+    assert stats.requested_current == {1500: 1}
+    assert stats.vdm_svids == {0xFF00: 1}
+
+def test_statistics_merge():
+    frames = [SOURCE_CAPS_9V, GOODCRC, REQUEST_1500MA, VDM, GOODCRC, VDM]
+    single = TrafficStatistics()
+    for frame in frames:
+        single.update(parse(frame))
+
+    first = TrafficStatistics()
+    second = TrafficStatistics()
+    for frame in frames[:3]:
+        first.update(parse(frame))
+    for frame in frames[3:]:
+        second.update(parse(frame))
+
+    assert first + second == single
+    restored = TrafficStatistics.from_dict(json.loads(json.dumps(second.to_dict())))
+    first += restored
+    assert first == single
+
+def test_statistics_merge_request_after_split():
+    frames = [SOURCE_CAPS_9V, GOODCRC, REQUEST_1500MA, GOODCRC]
+    single = TrafficStatistics()
+    for frame in frames:
+        single.update(parse(frame))
+
+    first = TrafficStatistics()
+    second = TrafficStatistics()
+    third = TrafficStatistics()
+    first.update(parse(frames[0]))
+    second.update(parse(frames[1]))
+    for frame in frames[2:]:
+        third.update(parse(frame))
+    assert third.requested_voltage == {}
+
+    assert first + second + third == single
+    assert first + (second + third) == single
+    assert single.requested_voltage == {5000: 1}
+
+    # Requests on another port are not resolved against these capabilities
+    other_port = TrafficStatistics()
+    other_port.update(parse(REQUEST_1500MA), port=1)
+    assert (first + other_port).requested_voltage == {}
+
+def test_statistics_serialized_split_request():
+    single = TrafficStatistics()
+    first = TrafficStatistics()
+    second = TrafficStatistics()
+    for frame in (SOURCE_CAPS_9V, GOODCRC):
+        single.update(parse(frame), port=3)
+        first.update(parse(frame), port=3)
+    for frame in (REQUEST_1500MA, GOODCRC):
+        single.update(parse(frame), port=3)
+        second.update(parse(frame), port=3)
+
+    def restore(stats):
+        return TrafficStatistics.from_dict(json.loads(json.dumps(stats.to_dict())))
+
+    merged = restore(first) + restore(second)
+    assert merged == single
+    assert merged.requested_voltage == {5000: 1}
+    # The context survives a merge and another round trip
+    assert restore(restore(first) + TrafficStatistics()) + restore(second) == single
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+from pyusbpd.message import *
+from pyusbpd.timing import *
+
+def source_caps(message_id=0):
+    msg = parse(b"\x61\x11\x96\x90\x01\x36\x3e\x61\x73\x9c")
+    msg.header.message_id = message_id
+    return msg
+
+def request(message_id=0):
+    msg = parse(b"\x82\x10\x96\x58\x02\x10")
+    msg.header.message_id = message_id
+    return msg
+
+def control(cls, message_id=0):
+    msg = cls()
+    msg.header.message_id = message_id
+    return msg
+
+def test_contract_negotiation_in_spec():
+    stream = [
+        (0.0000, source_caps(0)),
+        (0.0005, control(GoodCRCMessage, 0)),
+        (0.0100, request(0)),
+        (0.0105, control(GoodCRCMessage, 0)),
+        (0.0150, control(AcceptMessage, 1)),
+        (0.0155, control(GoodCRCMessage, 1)),
+        (0.2000, control(PS_RDYMessage, 2)),
+        (0.2005, control(GoodCRCMessage, 2)),
+    ]
+    assert list(analyze(stream)) == []
+
+def test_late_goodcrc():
+    analyzer = TimingAnalyzer()
+    assert analyzer.feed(0.0, source_caps(3)) == []
+    violations = analyzer.feed(0.002, control(GoodCRCMessage, 3))
+    assert len(violations) == 1
+    assert violations[0].rule == TimingRule.RECEIVE
+    assert not violations[0].missing
+
+def test_missing_request_and_ps_rdy():
+    analyzer = TimingAnalyzer()
+    analyzer.feed(0.0, source_caps(0), port="A")
+    analyzer.feed(0.0005, control(GoodCRCMessage, 0), port="A")
+    violations = analyzer.flush(0.1)
+    assert [v.rule for v in violations] == [TimingRule.SENDER_RESPONSE]
+    assert violations[0].missing
+    assert violations[0].port == "A"
+
+    analyzer.feed(1.0, request(1), port="B")
+    analyzer.feed(1.0005, control(GoodCRCMessage, 1), port="B")
+    analyzer.feed(1.005, control(AcceptMessage, 2), port="B")
+    analyzer.feed(1.0055, control(GoodCRCMessage, 2), port="B")
+    violations = analyzer.feed(1.7, control(PS_RDYMessage, 3), port="B")
+    assert [v.rule for v in violations] == [TimingRule.PS_TRANSITION]
+
+def test_source_capabilities_interval():
+    stream = [
+        (0.000, source_caps(0)),
+        (0.150, source_caps(0)),
+        (0.200, source_caps(0)),
+    ]
+    violations = [v for v in analyze(stream) if v.rule == TimingRule.SOURCE_CAP_INTERVAL]
+    assert len(violations) == 1
+    assert violations[0].start == 0.150
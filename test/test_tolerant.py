@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import pytest
+from pyusbpd.message import *
+from pyusbpd.tolerant import *
+
+SOURCE_CAPS = b"\x61\x11\x96\x90\x01\x36"
+SOURCE_CAPS_CRC = b"\x3e\x61\x73\x9c"
+SOURCE_CAPS_APDO = b"\x61\x21\x96\x90\x01\x36\x32\xa4\x01\xc0"
+GOODCRC = b"\x41\x0C"
+BAD_VDM = b"\x8F\x10\x07\xa0\x00\xFF"
+
+def test_decode_valid_frames():
+    assert isinstance(decode(SOURCE_CAPS), Source_CapabilitiesMessage)
+    assert isinstance(decode(GOODCRC), GoodCRCMessage)
+
+def test_decode_truncated():
+    result = decode(SOURCE_CAPS[:4])
+    assert isinstance(result, DecodeError)
+    assert result.category == DecodeErrorCategory.TRUNCATED
+    assert isinstance(result.message, Source_CapabilitiesMessage)
+    assert result.message.header.num_data_obj == 1
+    assert decode(b"\x41").category == DecodeErrorCategory.TRUNCATED
+
+def test_decode_invalid_vdm_command():
+    with pytest.raises(ValueError):
+        parse(BAD_VDM)
+    result = decode(BAD_VDM)
+    assert result.category == DecodeErrorCategory.INVALID_FIELD
+    assert result.message.data_objects == [b"\x07\xa0\x00\xFF"]
+
+def test_decode_augmented_pdo():
+    with pytest.raises(NotImplementedError):
+        parse(SOURCE_CAPS_APDO)
+    result = decode(SOURCE_CAPS_APDO)
+    assert result.category == DecodeErrorCategory.UNSUPPORTED
+    pdos = result.message.power_data_objects
+    assert isinstance(pdos[0], FixedSupplyPowerData)
+    assert type(pdos[1]) is PowerData
+
+def test_stream_resync():
+    decoder = TolerantDecoder()
+    stream = GOODCRC + b"\xFF\xFF\xFF" + SOURCE_CAPS + BAD_VDM + GOODCRC[:1]
+    chunks = [stream[i:i + 5] for i in range(0, len(stream), 5)]
+    results = list(decoder.decode_stream(chunks))
+
+    assert isinstance(results[0], GoodCRCMessage)
+    assert results[1].category == DecodeErrorCategory.RESYNC
+    assert results[1].raw == b"\xFF\xFF\xFF"
+    assert isinstance(results[2], Source_CapabilitiesMessage)
+    assert results[3].category == DecodeErrorCategory.INVALID_FIELD
+    assert results[4].category == DecodeErrorCategory.TRUNCATED
+    assert len(results) == 5
+    assert decoder.errors == {
+        DecodeErrorCategory.RESYNC: 1,
+        DecodeErrorCategory.INVALID_FIELD: 1,
+        DecodeErrorCategory.TRUNCATED: 1,
+    }
+
+def test_stream_crc():
+    decoder = TolerantDecoder(crc=True)
+    corrupted = SOURCE_CAPS[:3] + b"\x00" + SOURCE_CAPS[4:] + SOURCE_CAPS_CRC
+    results = decoder.feed(SOURCE_CAPS + SOURCE_CAPS_CRC + corrupted + SOURCE_CAPS + SOURCE_CAPS_CRC)
+    results += decoder.flush()
+    assert isinstance(results[0], Source_CapabilitiesMessage)
+    assert results[1].category == DecodeErrorCategory.RESYNC
+    assert results[1].raw == corrupted
+    assert isinstance(results[2], Source_CapabilitiesMessage)
+    assert len(results) == 3